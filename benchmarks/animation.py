@@ -0,0 +1,36 @@
+"""
+Measures streaming an animation from `repeat` + `plot` with frames drawn in the main
+process and in a process pool.
+
+    python -m benchmarks.animation --frames 200 --polygons 2000 --workers 4
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.render import make_polygons
+from src.animation import Animation
+from src.my_ast import DrawNode, RepeatCycleNode, TransformNode
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--frames", type=int, default=200)
+    arg_parser.add_argument("--polygons", type=int, default=2000)
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count())
+    arg_parser.add_argument("--format", default="gif")
+    args = arg_parser.parse_args()
+
+    polygons = make_polygons(args.polygons, 5)
+    polygons.pack()
+    with tempfile.TemporaryDirectory() as directory:
+        for workers in (None, args.workers):
+            animation = Animation(os.path.join(directory, f"scene.{args.format}"), workers=workers)
+            body = [TransformNode(polygons, "rotate", angle=2, origin=(0, 0)), DrawNode(polygons)]
+            start = time.perf_counter()
+            RepeatCycleNode(args.frames, body, animation).evaluate()
+            print(f"workers={workers}: {args.frames} frames in {time.perf_counter() - start:.2f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Measures loading a script from the on-disk program cache against parsing it.
+
+    python -m benchmarks.cache --objects 10000 --vertices 20
+"""
+
+import argparse
+import tempfile
+import time
+
+from benchmarks.generate import generate_script
+from src.cache import ProgramCache
+from src.parser import parse_program
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--objects", type=int, default=10000)
+    arg_parser.add_argument("--vertices", type=int, default=20)
+    args = arg_parser.parse_args()
+
+    script = generate_script(objects=args.objects, vertices=args.vertices)
+
+    start = time.perf_counter()
+    parse_program(script)
+    print(f"parse: {time.perf_counter() - start:.3f} s")
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ProgramCache(directory)
+        start = time.perf_counter()
+        cache.compile(script)
+        print(f"cache miss: {time.perf_counter() - start:.3f} s")
+        start = time.perf_counter()
+        cache.compile(script)
+        print(f"cache hit: {time.perf_counter() - start:.3f} s")
+
+if __name__ == "__main__":
+    main()
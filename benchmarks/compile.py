@@ -0,0 +1,65 @@
+"""
+Measures per-statement overhead of a tight `repeat` loop evaluated by walking the AST
+and run as closures compiled once by `compile()`. Plots go to a renderer that draws
+nothing, so the loop measures dispatch rather than drawing.
+
+    python -m benchmarks.compile --repetitions 50000
+"""
+
+import argparse
+import time
+
+from src.parser import parse_commands, parse_repeat_cycle
+from src.render import get_renderer, set_renderer
+
+code = """
+point a:
+    (0 0)
+    color = (255, 0, 0)
+
+point b:
+    (1 0)
+    color = (255, 0, 0)
+
+list l:
+    [a, b]
+"""
+
+loop = """repeat {repetitions}:
+    translate a: x = 1 y = 0
+    translate b: x = 1 y = 0
+    translate l: x = 0 y = 1
+    plot l
+"""
+
+class NullRenderer:
+    extent = None
+
+    def render(self, store, path=None):
+        pass
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--repetitions", type=int, default=50000)
+    args = arg_parser.parse_args()
+
+    previous = get_renderer()
+    set_renderer(NullRenderer())
+    try:
+        for variant in ("tree walk", "compiled"):
+            variables = parse_commands(code, {})
+            cycle = parse_repeat_cycle(loop.format(repetitions=args.repetitions), variables)
+            start = time.perf_counter()
+            if variant == "tree walk":
+                for _ in range(cycle.repetitions):
+                    for el in cycle.body:
+                        el.evaluate()
+            else:
+                cycle.compile()()
+            elapsed = time.perf_counter() - start
+            print(f"{variant}: {elapsed:.3f} s, {elapsed / (args.repetitions * len(cycle.body)) * 1e6:.2f} us per statement")
+    finally:
+        set_renderer(previous)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Compares the latency of rendering a script by a cold `python main.py` with requests to a
+running render service, one client after another and several clients at once.
+
+    python -m benchmarks.daemon --objects 200 --requests 50 --clients 4
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.generate import generate_script
+from src.daemon import RenderClient, RenderService
+
+def percentiles(latencies: list[float]) -> str:
+    ordered = sorted(latencies)
+    def at(share: float) -> float:
+        return ordered[min(len(ordered) - 1, int(share * len(ordered)))] * 1000
+    return f"median {at(0.5):7.1f} ms  p95 {at(0.95):7.1f} ms"
+
+async def requests(address: str, script: str, count: int) -> list[float]:
+    client = await RenderClient.connect(address)
+    latencies = []
+    try:
+        for _ in range(count):
+            start = time.perf_counter()
+            await client.render(script)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        await client.close()
+    return latencies
+
+async def measure_service(address: str, script: str, count: int, clients: int, workers: int, renderer: str):
+    service = RenderService(workers, renderer)
+    start = time.perf_counter()
+    await service.start(address)
+    print(f"service start: {time.perf_counter() - start:.2f} s")
+    try:
+        latencies = await requests(address, script, count)
+        print(f"service, 1 client:   {percentiles(latencies)}")
+        start = time.perf_counter()
+        results = await asyncio.gather(*(requests(address, script, count) for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+        print(f"service, {clients} clients:  {percentiles([latency for result in results for latency in result])}  {clients * count / elapsed:.0f} requests/s")
+    finally:
+        await service.stop()
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--objects", type=int, default=200)
+    arg_parser.add_argument("--requests", type=int, default=50, help="requests per client")
+    arg_parser.add_argument("--clients", type=int, default=4)
+    arg_parser.add_argument("--workers", type=int, default=None)
+    arg_parser.add_argument("--renderer", choices=["matplotlib", "raster"], default="matplotlib")
+    arg_parser.add_argument("--cold", type=int, default=3, help="runs of python main.py")
+    args = arg_parser.parse_args()
+
+    script = generate_script(objects=args.objects, plot_every=args.objects)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "script.pd")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(script)
+        latencies = []
+        for _ in range(args.cold):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, os.path.join(root, "main.py"), path], cwd=directory, check=True, env=dict(os.environ, MPLBACKEND="Agg"))
+            latencies.append(time.perf_counter() - start)
+        print(f"cold main.py:        {percentiles(latencies)}")
+
+        asyncio.run(measure_service(os.path.join(directory, "polydraw.sock"), script, args.requests, args.clients, args.workers, args.renderer))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Generates PolyDraw scripts used by the benchmarks.
+"""
+
+import random
+
+def generate_polygon(name: str, vertices: int, rng: random.Random) -> str:
+    points = ", ".join(f"{rng.uniform(-100, 100):.3f} {rng.uniform(-100, 100):.3f}" for _ in range(vertices))
+    return f"polygon {name}:\n    points = ({points})\n    color = ({rng.randrange(256)}, {rng.randrange(256)}, {rng.randrange(256)})"
+
+def indent(block: str, depth: int) -> str:
+    return "\n".join("    " * depth + line for line in block.split("\n"))
+
+def generate_script(objects: int = 1000, vertices: int = 4, list_size: int = 10, seed: int = 0, repeat_depth: int = 0, repetitions: int = 2, plot_every: int = 0) -> str:
+    """
+    Returns a script with `objects` geometry definitions, grouped into lists that are transformed.
+    With `repeat_depth` each transform is nested in that many `repeat` cycles, with
+    `plot_every` every such list is also plotted after its transform.
+    """
+    rng = random.Random(seed)
+    blocks = []
+    names = []
+
+    for i in range(objects):
+        kind = i % 4
+        name = f"g{i}"
+        if kind == 0:
+            blocks.append(generate_polygon(name, vertices, rng))
+        elif kind == 1:
+            blocks.append(f"line {name}:\n    points = ({rng.randint(-50, 50)} {rng.randint(-50, 50)}, {rng.randint(-50, 50)} {rng.randint(-50, 50)})\n    color = (0, 0, 255)")
+        elif kind == 2:
+            blocks.append(f"point {name}:\n    coord = ({rng.randint(-50, 50)} {rng.randint(-50, 50)})\n    color = (0, 255, 0)")
+        else:
+            blocks.append(f"circle {name}:\n    center = ({rng.randint(-50, 50)} {rng.randint(-50, 50)})\n    radius = {rng.randint(1, 10)}\n    color = (255, 0, 0)")
+        names.append(name)
+
+        if len(names) == list_size:
+            list_name = f"l{i}"
+            blocks.append(f"list {list_name}:\n    [{', '.join(names)}]")
+            body = [f"translate {list_name}:\n    x = 1\n    y = -1"]
+            if plot_every and (i // list_size) % plot_every == 0:
+                body.append(f"plot {list_name}")
+            for _ in range(repeat_depth):
+                body = [f"repeat {repetitions}:\n" + "\n".join(indent(el, 1) for el in body)]
+            blocks.extend(body)
+            names = []
+
+    return "\n\n".join(blocks) + "\n"
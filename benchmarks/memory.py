@@ -0,0 +1,59 @@
+"""
+Compares memory and bulk transform time of a list of standalone nodes and of a list
+backed by a GeometryStore. Each variant runs in its own process.
+
+    python -m benchmarks.memory --shapes 1000000
+"""
+
+import argparse
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+def build(variant: str, shapes: int, vertices: int):
+    from src.my_ast import PolygonNode, GeometryListNode
+    from src.store import GeometryStore, POLYGON
+
+    rng = np.random.default_rng(0)
+    rings = rng.uniform(-100, 100, (shapes, vertices + 1, 2))
+    rings[:, -1] = rings[:, 0]
+    colors = rng.integers(0, 256, (shapes, 3))
+
+    if variant == "nodes":
+        geometries = GeometryListNode()
+        for ring, color in zip(rings, colors.tolist()):
+            geometries.add(PolygonNode(ring, color=color))
+    else:
+        offsets = np.arange(shapes + 1) * (vertices + 1)
+        store = GeometryStore(rings.reshape(-1, 2), offsets, np.full(shapes, POLYGON), colors)
+        geometries = GeometryListNode.from_store(store)
+    return geometries
+
+def measure(variant: str, shapes: int, vertices: int) -> tuple[float, float]:
+    from src.my_ast import TransformNode
+
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    geometries = build(variant, shapes, vertices)
+    memory = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) / 1024
+
+    transform = TransformNode(geometries, operation="rotate", angle=10, origin="center")
+    start = time.perf_counter()
+    transform.evaluate()
+    return memory, time.perf_counter() - start
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--shapes", type=int, default=200000)
+    arg_parser.add_argument("--vertices", type=int, default=4)
+    args = arg_parser.parse_args()
+
+    for variant in ("nodes", "store"):
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+            memory, elapsed = executor.submit(measure, variant, args.shapes, args.vertices).result()
+        print(f"{variant}: {memory:,.0f} MiB for {args.shapes} shapes, rotate around center {elapsed:.3f} s")
+
+if __name__ == "__main__":
+    main()
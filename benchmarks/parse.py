@@ -0,0 +1,32 @@
+"""
+Measures parsing throughput of PolyDraw scripts in blocks per second.
+
+    python -m benchmarks.parse --objects 20000
+"""
+
+import argparse
+import time
+
+from benchmarks.generate import generate_script
+from src.parser import parse_commands, tokenize_script_to_blocks
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--objects", type=int, default=10000)
+    arg_parser.add_argument("--vertices", type=int, default=4)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    script = generate_script(objects=args.objects, vertices=args.vertices)
+    blocks = len(tokenize_script_to_blocks(script))
+
+    best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        parse_commands(script, {})
+        best = min(best, time.perf_counter() - start)
+
+    print(f"{blocks} blocks in {best:.3f} s: {blocks / best:,.0f} blocks/s")
+
+if __name__ == "__main__":
+    main()
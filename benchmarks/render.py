@@ -0,0 +1,43 @@
+"""
+Measures rendering of many polygons with `plot` by the matplotlib and the Pillow renderer.
+
+    python -m benchmarks.render --polygons 100000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from src.my_ast import PolygonNode, GeometryListNode, DrawNode
+from src.raster import RasterRenderer
+from src.render import Renderer
+
+def make_polygons(count: int, vertices: int) -> GeometryListNode:
+    rng = np.random.default_rng(0)
+    centers = rng.uniform(-1000, 1000, (count, 1, 2))
+    polygons = GeometryListNode()
+    for ring, color in zip(centers + rng.uniform(-5, 5, (count, vertices, 2)), rng.integers(0, 256, (count, 3)).tolist()):
+        polygons.add(PolygonNode(ring, color=color))
+    return polygons
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--polygons", type=int, default=100000)
+    arg_parser.add_argument("--vertices", type=int, default=5)
+    arg_parser.add_argument("--format", default="png")
+    args = arg_parser.parse_args()
+
+    polygons = make_polygons(args.polygons, args.vertices)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f"frame.{args.format}")
+        for name, renderer in [("matplotlib", Renderer(path=path, headless=True)), ("raster", RasterRenderer(path=path))]:
+            plot = DrawNode(polygons, renderer=renderer)
+            start = time.perf_counter()
+            plot.evaluate()
+            print(f"{name}: {args.polygons} polygons rendered in {time.perf_counter() - start:.2f} s")
+
+if __name__ == "__main__":
+    main()
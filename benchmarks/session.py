@@ -0,0 +1,42 @@
+"""
+Measures re-running an edited script with an incremental Session against a full run.
+
+    python -m benchmarks.session --objects 10000
+"""
+
+import argparse
+import time
+
+from benchmarks.generate import generate_script
+from src.parser import parse_commands, tokenize_script_to_blocks
+from src.session import Session
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--objects", type=int, default=10000)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    script = generate_script(objects=args.objects)
+    # Úprava jednoho řádku uprostřed skriptu
+    middle = script.index("color = (0, 255, 0)", len(script) // 2)
+    edited = script[:middle] + "color = (0, 250, 0)" + script[middle + len("color = (0, 255, 0)"):]
+    blocks = len(tokenize_script_to_blocks(script))
+
+    start = time.perf_counter()
+    parse_commands(edited, {})
+    print(f"full run: {blocks} blocks in {time.perf_counter() - start:.3f} s")
+
+    session = Session()
+    session.update(script)
+    best = float("inf")
+    for _ in range(args.repeat):
+        session.update(script)
+        executed = session.executed
+        start = time.perf_counter()
+        session.update(edited)
+        best = min(best, time.perf_counter() - start)
+    print(f"incremental: one line edited in {best * 1000:.1f} ms, {session.executed - executed} blocks executed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Measures how long `import src.parser` takes in a fresh interpreter and fails when it is
+over the budget or when it loads a library that only plotting and exports need.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --budget 0.3 --repeat 10
+
+The time is the best of `--repeat` runs, each in a new process, so the operating system
+file cache is warm but no module is imported yet.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Výchozí limit v sekundách, numpy, shapely a parsy samy zaberou zhruba polovinu
+BUDGET = 0.5
+# Knihovny, které se smí načíst až při vykreslení nebo exportu
+heavy_modules = ["matplotlib", "PIL", "src.raster", "src.animation"]
+
+probe = f"""
+import json, sys, time
+start = time.perf_counter()
+import src.parser
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [name for name in {heavy_modules!r} if name in sys.modules]}}))
+"""
+
+def measure() -> dict:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", probe], cwd=root, capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--budget", type=float, default=BUDGET, help="allowed import time in seconds")
+    arg_parser.add_argument("--repeat", type=int, default=5, help="runs, the best one counts")
+    args = arg_parser.parse_args()
+
+    runs = [measure() for _ in range(args.repeat)]
+    best = min(run["seconds"] for run in runs)
+    loaded = sorted({name for run in runs for name in run["loaded"]})
+    print(f"import src.parser: best {best * 1000:.0f} ms of {args.repeat} runs, budget {args.budget * 1000:.0f} ms")
+
+    failed = False
+    if best > args.budget:
+        print(f"OVER BUDGET by {(best - args.budget) * 1000:.0f} ms")
+        failed = True
+    if loaded:
+        print(f"loaded at startup: {', '.join(loaded)}")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Compares peak memory of running a script file read whole with `parse_commands` and
+streamed block by block with `run_file`. Each variant runs in its own process.
+
+    python -m benchmarks.stream --objects 100000
+"""
+
+import argparse
+import os
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from benchmarks.generate import generate_script
+
+def measure(variant: str, path: str) -> tuple[float, float]:
+    from src.parser import parse_commands, run_file
+
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if variant == "whole":
+        with open(path, encoding="utf-8") as file:
+            parse_commands(file.read(), {})
+    else:
+        run_file(path, {})
+    elapsed = time.perf_counter() - start
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) / 1024, elapsed
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--objects", type=int, default=100000)
+    arg_parser.add_argument("--vertices", type=int, default=20)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "script.pd")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(generate_script(objects=args.objects, vertices=args.vertices))
+        size = os.path.getsize(path) / 2 ** 20
+
+        for variant in ("whole", "stream"):
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                memory, elapsed = executor.submit(measure, variant, path).result()
+            print(f"{variant}: {size:.0f} MiB script, peak +{memory:,.0f} MiB, {elapsed:.2f} s")
+
+if __name__ == "__main__":
+    main()
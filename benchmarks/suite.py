@@ -0,0 +1,184 @@
+"""
+Runs generated workloads that scale one parameter at a time and checks them against a
+stored baseline. For every workload it measures parse time, evaluate time, render time
+and peak memory, each workload in its own process. Times are the best of `--repeat` runs.
+
+    python -m benchmarks.suite --save            # stores benchmarks/baseline.json
+    python -m benchmarks.suite --check           # fails on a regression over the threshold
+    python -m benchmarks.suite --only objects --check --threshold 1.3
+
+Evaluate time excludes rendering. Each run also times a small fixed workload, times
+are compared with the baseline relative to it. Plots are drawn by the raster renderer to a small
+image in a temporary directory. Peak memory is the growth of the maximum resident set
+size of the process while the script runs.
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from benchmarks.generate import generate_script
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Výchozí parametry, každá řada mění jen jeden z nich
+base = {"objects": 2000, "vertices": 8, "list_size": 10, "repeat_depth": 0, "plot_every": 0}
+series = {
+    "objects": [1000, 4000, 16000],
+    "vertices": [4, 32, 128],
+    "list_size": [10, 100, 1000],
+    "repeat_depth": [1, 2, 3],
+    "plot_every": [100, 20],
+}
+
+# Rozdíly pod touto hranicí jsou šum, ne regrese
+MIN_SECONDS = 0.02
+MIN_MIB = 2.0
+# Velikost pevné zátěže, podle které se časy přepočítají na rychlost stroje při měření
+CALIBRATION_OBJECTS = 500
+
+def workloads() -> dict[str, dict]:
+    result = {}
+    for parameter, values in series.items():
+        for value in values:
+            result[f"{parameter}={value}"] = dict(base, **{parameter: value})
+    return result
+
+class TimedRenderer:
+    # Měří čas vykreslení, aby se dal odečíst od času vyhodnocení
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.seconds = 0.0
+
+    @property
+    def extent(self):
+        return self.renderer.extent
+
+    def render(self, store, path=None):
+        start = time.perf_counter()
+        self.renderer.render(store, path)
+        self.seconds += time.perf_counter() - start
+
+def measure(params: dict, repeat: int) -> dict:
+    from src.parser import parse_program, execute
+    from src.raster import RasterRenderer
+    from src.render import set_renderer
+    from src.symbols import SymbolTable
+
+    script = generate_script(**params)
+    # Zahřátí, první běh v procesu platí i za první použití knihoven
+    warm_up = SymbolTable({})
+    for statement in parse_program(generate_script(objects=8, list_size=4, plot_every=1)):
+        execute(statement, warm_up)
+    calibration = generate_script(objects=CALIBRATION_OBJECTS)
+
+    best: dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        for _ in range(repeat):
+            renderer = TimedRenderer(RasterRenderer(path=os.path.join(directory, "frame.png"), size=(160, 120)))
+            set_renderer(renderer)
+
+            start = time.perf_counter()
+            statements = parse_program(script)
+            parse = time.perf_counter() - start
+
+            symbols = SymbolTable({})
+            start = time.perf_counter()
+            for statement in statements:
+                execute(statement, symbols)
+            total = time.perf_counter() - start
+
+            # Pevná zátěž změřená hned vedle ukazuje, jak rychlý je stroj právě teď
+            start = time.perf_counter()
+            calibration_symbols = SymbolTable({})
+            for statement in parse_program(calibration):
+                execute(statement, calibration_symbols)
+            speed = time.perf_counter() - start
+
+            # Nejlepší z opakování, pomalejší běhy jsou rušené okolím
+            for metric, value in (("parse_s", parse), ("evaluate_s", total - renderer.seconds), ("render_s", renderer.seconds), ("calibration_s", speed)):
+                best[metric] = min(best.get(metric, value), value)
+            del statements, symbols, calibration_symbols
+        best["peak_mib"] = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) / 1024
+    return best
+
+def run(names: list[str], repeat: int = 3) -> dict[str, dict]:
+    results = {}
+    for name in names:
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+            results[name] = executor.submit(measure, workloads()[name], repeat).result()
+        metrics = results[name]
+        print(f"{name:<20} parse {metrics['parse_s']:8.3f} s  evaluate {metrics['evaluate_s']:8.3f} s  render {metrics['render_s']:8.3f} s  peak {metrics['peak_mib']:8.1f} MiB")
+    return results
+
+def regressions(results: dict[str, dict], baseline: dict[str, dict], threshold: float) -> list[str]:
+    """
+    Returns descriptions of metrics that grew over `threshold` times their baseline value.
+    Times are first scaled by the calibration measured with them, so a machine that is
+    slower or busier than when the baseline was stored does not look like a regression.
+    """
+    found = []
+    for name, metrics in results.items():
+        if name not in baseline:
+            continue
+        speed = metrics["calibration_s"] / baseline[name]["calibration_s"] if "calibration_s" in baseline[name] else 1.0
+        for metric, value in metrics.items():
+            reference = baseline[name].get(metric)
+            if reference is None or metric == "calibration_s":
+                continue
+            if metric.endswith("_s"):
+                value, minimum = value / speed, MIN_SECONDS
+            else:
+                minimum = MIN_MIB
+            if value > reference * threshold and value - reference > minimum:
+                found.append(f"{name} {metric}: {value:.3f} vs baseline {reference:.3f} ({value / max(reference, 1e-12):.2f}x)")
+    return found
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--only", help="run only workloads whose name contains this text")
+    arg_parser.add_argument("--baseline", default=BASELINE)
+    arg_parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    arg_parser.add_argument("--check", action="store_true", help="compare the results with the baseline")
+    arg_parser.add_argument("--threshold", type=float, default=1.5, help="allowed ratio to the baseline")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="runs per workload, the best one counts")
+    args = arg_parser.parse_args()
+
+    names = [name for name in workloads() if not args.only or args.only in name]
+    results = run(names, args.repeat)
+
+    if args.check:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        found = regressions(results, baseline, args.threshold)
+        if found:
+            # Regrese se potvrdí druhým během zasažených zátěží, platí lepší z obou
+            print("re-running workloads over the threshold")
+            again = run([name for name in results if regressions({name: results[name]}, baseline, args.threshold)], args.repeat)
+            for name, metrics in again.items():
+                results[name] = {metric: min(value, results[name][metric]) for metric, value in metrics.items()}
+            found = regressions(results, baseline, args.threshold)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+        print(f"no regressions over {args.threshold}x the baseline")
+
+    if args.save:
+        stored = {"base": base, "series": series, "results": results}
+        if os.path.exists(args.baseline) and args.only:
+            # Částečný běh přepíše jen změřené zátěže
+            with open(args.baseline, encoding="utf-8") as file:
+                stored["results"] = dict(json.load(file)["results"], **results)
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(stored, file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Measures transforms of a long geometry list.
+
+    python -m benchmarks.transform --members 50000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from src.my_ast import PolygonNode, GeometryListNode, TransformNode
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--members", type=int, default=50000)
+    arg_parser.add_argument("--vertices", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    geometries = GeometryListNode()
+    for _ in range(args.members):
+        geometries.add(PolygonNode(rng.uniform(-100, 100, (args.vertices, 2)), color=[255, 0, 0]))
+
+    for operation, kwargs in [("translate", {"x": 1, "y": 2}), ("scale", {"factor": 0.5, "origin": (0, 0)}), ("rotate", {"angle": 10, "origin": "center"})]:
+        transform = TransformNode(geometries, operation=operation, kwargs=kwargs)
+        start = time.perf_counter()
+        transform.evaluate()
+        elapsed = time.perf_counter() - start
+        print(f"{operation} {kwargs}: {elapsed:.3f} s, {args.members / elapsed:,.0f} geometries/s")
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,26 @@
 """
 Runs PolyDraw scripts.
-"""
-
-from src.parser import parse_polygon, parse_commands
-
-# parse_polygon("polygon pol_y_12a1_: points = (1 2, 4 5, 7 8) color = (255, 0, 0)")
 
-# code = """
-#     polygon pol:
-#         points = (1 2, 5 6, 7 8)
-#         color = (255, 0, 0)
+    python main.py script.pd
+    python main.py script.pd --profile --profile-json profile.json --memory
+    python main.py *.pd --workers 8 --output out --report report.json
+    python main.py --manifest scripts.txt --renderer raster --cache
+    python main.py --serve /tmp/polydraw.sock --workers 4
 
-#     polygon pol1:
-#         points = (5 2, 5 9, 7 8)
-#         color = (255, 0, 255)
-#     """
+One script runs in this process, like before. Several scripts, or a manifest with one
+script path per line, run in a pool of warm worker processes and every plot is saved to
+the output directory under the path of its script relative to the directory the scripts
+share. With `--serve` PolyDraw runs as a render service on a Unix socket or `host:port`
+until it is interrupted. With `--cache` parsed scripts are kept in the program cache
+($POLYDRAW_CACHE or ~/.cache/polydraw), so an unchanged script is not parsed again.
+"""
 
-# parse_commands(code)
+import argparse
+import json
+import sys
+import time
 
-code = """
+example = """
 polygon p1:
     points = (0 0, 1 1, 1 0)
     color = (255, 0, 0)
@@ -38,5 +40,93 @@ repeat 2:
 
     plot l
 """
-        
-parsed = parse_commands(code, {})
\ No newline at end of file
+
+def run_single(args):
+    from src.parser import parse_commands
+    from src.profiling import Profiler
+
+    code = example
+    if args.scripts:
+        with open(args.scripts[0], encoding="utf-8") as file:
+            code = file.read()
+
+    run = parse_commands
+    if args.cache:
+        from src.cache import run_cached
+        run = run_cached
+
+    if not (args.profile or args.profile_json):
+        run(code, {})
+        return 0
+
+    with Profiler(memory=args.memory) as profiler:
+        run(code, {})
+    if args.profile:
+        print(profiler.text())
+    if args.profile_json:
+        profiler.to_json(args.profile_json)
+    return 0
+
+def run_many(args, scripts: list[str]):
+    # Hlavní proces knihovny pro kreslení nenačítá, práci dělají jen procesy v poolu
+    from src.batch import run_batch
+
+    results = []
+    start = time.perf_counter()
+    for result in run_batch(scripts, args.workers, args.output, args.renderer, args.cache):
+        results.append(result)
+        if result["error"] is None:
+            print(f"ok     {result['seconds']:8.3f} s  {result['script']}")
+        else:
+            print(f"FAILED {result['seconds']:8.3f} s  {result['script']}: {result['error']}")
+    elapsed = time.perf_counter() - start
+
+    failed = sum(result["error"] is not None for result in results)
+    print(f"{len(results)} scripts in {elapsed:.2f} s ({len(results) / max(elapsed, 1e-9):.1f} scripts/s), {failed} failed")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as file:
+            json.dump({"seconds": elapsed, "failed": failed, "results": results}, file, indent=2)
+    return 1 if failed else 0
+
+def run_service(args):
+    import asyncio
+    from src.daemon import serve
+
+    print(f"serving on {args.serve}")
+    try:
+        asyncio.run(serve(args.serve, args.workers, args.renderer))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Runs PolyDraw scripts.")
+    arg_parser.add_argument("scripts", nargs="*", help="script files, an example script is run if none is given")
+    arg_parser.add_argument("--manifest", help="file with one script path per line, relative to the manifest")
+    arg_parser.add_argument("--workers", type=int, help="worker processes for several scripts or the service, the number of CPUs by default")
+    arg_parser.add_argument("--output", default=".", help="directory for the plots of several scripts")
+    arg_parser.add_argument("--renderer", choices=["matplotlib", "raster"], default="matplotlib", help="renderer for several scripts or the service")
+    arg_parser.add_argument("--report", help="write the results of several scripts to this JSON file")
+    arg_parser.add_argument("--cache", action="store_true", help="load parsed scripts from the on-disk program cache and store new ones there")
+    arg_parser.add_argument("--serve", metavar="ADDRESS", help="run a render service on this Unix socket path or loopback host:port")
+    arg_parser.add_argument("--profile", action="store_true", help="print time, calls and vertices per phase, command, line, node and renderer")
+    arg_parser.add_argument("--profile-json", help="write the profile to this JSON file")
+    arg_parser.add_argument("--memory", action="store_true", help="measure peak allocations with tracemalloc too, slows the run down")
+    args = arg_parser.parse_args()
+
+    if args.serve:
+        return run_service(args)
+
+    scripts = list(args.scripts)
+    if args.manifest:
+        from src.batch import read_manifest
+        scripts += read_manifest(args.manifest)
+
+    if len(scripts) <= 1 and not args.manifest and args.workers is None:
+        return run_single(args)
+    if args.profile or args.profile_json:
+        arg_parser.error("profiling runs a single script in this process")
+    return run_many(args, scripts)
+
+if __name__ == "__main__":
+    sys.exit(main())
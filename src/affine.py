@@ -0,0 +1,143 @@
+"""
+Affine matrices of PolyDraw transforms and their batched application to shapely geometries.
+
+Matrices are 3x3 augmented matrices acting on column vectors (x, y, 1), the same
+convention and coefficients as `shapely.affinity`. Every builder also accepts an
+array of origins of shape (N, 2) and then returns a stack of N matrices.
+"""
+
+import math
+from functools import partial
+from typing import Callable
+
+import numpy as np
+import shapely
+
+def _matrix(a, b, d, e, xoff, yoff) -> np.ndarray:
+    xoff, yoff = np.broadcast_arrays(np.asarray(xoff, dtype=np.float64), np.asarray(yoff, dtype=np.float64))
+    matrix = np.zeros(xoff.shape + (3, 3))
+    matrix[..., 0, 0] = a
+    matrix[..., 0, 1] = b
+    matrix[..., 0, 2] = xoff
+    matrix[..., 1, 0] = d
+    matrix[..., 1, 1] = e
+    matrix[..., 1, 2] = yoff
+    matrix[..., 2, 2] = 1.0
+    return matrix
+
+def translation_matrix(x: float, y: float) -> np.ndarray:
+    return _matrix(1.0, 0.0, 0.0, 1.0, x, y)
+
+def rotation_matrix(angle: float, origin=(0.0, 0.0)) -> np.ndarray:
+    # Úhel ve stupních proti směru hodinových ručiček, stejně jako shapely.affinity.rotate
+    angle = angle * math.pi / 180.0
+    cosp, sinp = math.cos(angle), math.sin(angle)
+    if abs(cosp) < 2.5e-16:
+        cosp = 0.0
+    if abs(sinp) < 2.5e-16:
+        sinp = 0.0
+    origin = np.asarray(origin, dtype=np.float64)
+    x0, y0 = origin[..., 0], origin[..., 1]
+    return _matrix(cosp, -sinp, sinp, cosp, x0 - x0 * cosp + y0 * sinp, y0 - x0 * sinp - y0 * cosp)
+
+def scale_matrix(xfact: float, yfact: float, origin=(0.0, 0.0)) -> np.ndarray:
+    origin = np.asarray(origin, dtype=np.float64)
+    x0, y0 = origin[..., 0], origin[..., 1]
+    return _matrix(xfact, 0.0, 0.0, yfact, x0 - x0 * xfact, y0 - y0 * yfact)
+
+def is_fixed_origin(operation: str, kwargs: dict) -> bool:
+    # "center" a "centroid" závisí na aktuálním tvaru geometrie
+    return operation == "translate" or not isinstance(kwargs.get("origin", "center"), str)
+
+def bounds_centers(bounds: np.ndarray) -> np.ndarray:
+    return np.stack([(bounds[:, 2] + bounds[:, 0]) / 2.0, (bounds[:, 3] + bounds[:, 1]) / 2.0], axis=-1)
+
+def origins(origin, geometries: np.ndarray) -> np.ndarray:
+    if origin == "center":
+        return bounds_centers(shapely.bounds(geometries))
+    if origin == "centroid":
+        return shapely.get_coordinates(shapely.centroid(geometries))
+    if isinstance(origin, str):
+        raise ValueError(f"'origin' keyword {origin!r} is not recognized")
+    return np.asarray(origin, dtype=np.float64)
+
+def operation_matrix(operation: str, kwargs: dict, geometries: np.ndarray = None, origin: np.ndarray = None) -> np.ndarray:
+    """
+    Returns the matrix of a `translate`, `rotate` or `scale` operation. With an origin
+    relative to the geometry ("center", "centroid") one matrix per geometry is returned,
+    the origins are taken from `geometries` unless given directly as `origin`.
+    """
+    if origin is None:
+        origin = kwargs.get("origin", "center") # tuple[x, y] or default "center"
+        if not is_fixed_origin(operation, kwargs):
+            origin = origins(origin, geometries)
+    return origin_matrix(operation, kwargs)(origin)
+
+def origin_matrix(operation: str, kwargs: dict) -> Callable[..., np.ndarray]:
+    # Funkce počátek -> matice operace, operace a její argumenty se vyberou jen jednou
+    match operation:
+        case "translate":
+            matrix = translation_matrix(kwargs.get("x", 0), kwargs.get("y", 0))
+            return lambda origin: matrix
+        case "rotate":
+            return partial(rotation_matrix, kwargs.get("angle", 0))
+        case "scale":
+            factor = kwargs.get("factor", 0.5)
+            return partial(scale_matrix, factor, factor)
+        case _:
+            raise ValueError(f"Unknown transform: {operation}")
+
+def transform_coords(coords: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    # Ruční násobení jako v shapely.affinity, maticové násobení není stejně přesné
+    x, y = coords[..., 0], coords[..., 1]
+    a, b, xoff = matrix[..., 0, 0], matrix[..., 0, 1], matrix[..., 0, 2]
+    d, e, yoff = matrix[..., 1, 0], matrix[..., 1, 1], matrix[..., 1, 2]
+    return np.stack([a * x + b * y + xoff, d * x + e * y + yoff], axis=-1)
+
+def transform_in_place(coords: np.ndarray, matrix: np.ndarray):
+    # Stejný výpočet jako transform_coords, výsledek se zapíše zpět bez skládání nového pole
+    x, y = coords[..., 0].copy(), coords[..., 1]
+    a, b, xoff = matrix[..., 0, 0], matrix[..., 0, 1], matrix[..., 0, 2]
+    d, e, yoff = matrix[..., 1, 0], matrix[..., 1, 1], matrix[..., 1, 2]
+    coords[..., 0] = a * x + b * y + xoff
+    coords[..., 1] = d * x + e * y + yoff
+
+def apply_matrix(geometries: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """
+    Transforms an array of geometries in one pass over all their coordinates. `matrix` is
+    either one 3x3 matrix for all geometries or a stack of matrices, one per geometry.
+    """
+    if matrix.ndim == 2:
+        return shapely.transform(geometries, lambda coords: transform_coords(coords, matrix))
+
+    geometries = np.array(geometries, dtype=object)
+    coords, index = shapely.get_coordinates(geometries, return_index=True)
+    return shapely.set_coordinates(geometries, transform_coords(coords, matrix[index]))
+
+def compose_effects(effects: list[tuple[list, np.ndarray]], repetitions: int = 1) -> tuple[list, np.ndarray]:
+    """
+    Composes affine effects `(nodes, matrices)` applied one after another into a single
+    effect with one matrix per distinct node, raised to the power of `repetitions`.
+    """
+    rows: dict[int, int] = {}
+    nodes = []
+    steps = []
+    for effect_nodes, effect_matrices in effects:
+        index = []
+        for node in effect_nodes:
+            row = rows.setdefault(id(node), len(nodes))
+            if row == len(nodes):
+                nodes.append(node)
+            index.append(row)
+        steps.append((np.array(index, dtype=np.intp), np.broadcast_to(effect_matrices, (len(index), 3, 3))))
+
+    matrices = np.broadcast_to(np.eye(3), (len(nodes), 3, 3)).copy()
+    for index, step in steps:
+        # Uzel může být v seznamu vícekrát, jeho matice se pak násobí postupně
+        while len(index):
+            unique_rows, first = np.unique(index, return_index=True)
+            matrices[unique_rows] = step[first] @ matrices[unique_rows]
+            rest = np.setdiff1d(np.arange(len(index)), first)
+            index, step = index[rest], step[rest]
+
+    return nodes, np.linalg.matrix_power(matrices, repetitions)
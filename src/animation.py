@@ -0,0 +1,179 @@
+"""
+Streams frames of `plot` commands inside a `repeat` cycle to one animated GIF or APNG.
+
+Every frame is encoded and written to disk as soon as it is drawn, so memory does not
+grow with the number of iterations. Frames are drawn by `RasterRenderer` with the view
+fixed to the bounds of the first frame.
+
+With `workers` the frames are drawn and encoded in a process pool. Each `plot` only
+sends a copy of the geometry store to a worker and the encoded frames are written in
+order; at most a few frames per worker are in flight at any time.
+"""
+
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image, GifImagePlugin
+
+from src.raster import RasterRenderer
+from src.store import GeometryStore
+
+class GifWriter:
+    def __init__(self, path: str, duration: int, loop: int):
+        self.file = open(path, "wb")
+        self.duration = duration
+        self.loop = loop
+        self.frames = 0
+
+    @staticmethod
+    def encode(image: Image.Image, duration: int, loop: int) -> tuple[bytes, bytes]:
+        # Každý snímek má vlastní paletu, hlavičku souboru použije jen první snímek
+        frame = image.convert("RGB").quantize(256)
+        header, _ = GifImagePlugin.getheader(frame.copy(), info={"loop": loop, "duration": duration})
+        return b"".join(header), b"".join(GifImagePlugin.getdata(frame, duration=duration, include_color_table=True))
+
+    def write(self, image: Image.Image):
+        self.write_encoded(self.encode(image, self.duration, self.loop))
+
+    def write_encoded(self, frame: tuple[bytes, bytes]):
+        header, data = frame
+        if not self.frames:
+            self.file.write(header)
+        self.file.write(data)
+        self.frames += 1
+
+    def close(self):
+        self.file.write(b";")
+        self.file.close()
+
+class ApngWriter:
+    def __init__(self, path: str, duration: int, loop: int):
+        self.file = open(path, "wb")
+        self.duration = duration
+        self.loop = loop
+        self.frames = 0
+        self.sequence = 0
+        self.actl = 0
+
+    def chunk(self, kind: bytes, data: bytes):
+        self.file.write(struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data)))
+
+    @staticmethod
+    def encode(image: Image.Image, duration: int, loop: int) -> tuple[int, int, bytes]:
+        pixels = np.asarray(image.convert("RGB"))
+        height, width = pixels.shape[:2]
+        # Řádky s filtrem 0 (bez filtru) před každým řádkem
+        rows = np.concatenate([np.zeros((height, 1), dtype=np.uint8), pixels.reshape(height, -1)], axis=1)
+        return width, height, zlib.compress(rows.tobytes())
+
+    def write(self, image: Image.Image):
+        self.write_encoded(self.encode(image, self.duration, self.loop))
+
+    def write_encoded(self, frame: tuple[int, int, bytes]):
+        width, height, data = frame
+        if not self.frames:
+            self.file.write(b"\x89PNG\r\n\x1a\n")
+            self.chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            # Počet snímků ještě není známý, doplní se při zavření
+            self.actl = self.file.tell()
+            self.chunk(b"acTL", struct.pack(">II", 0, self.loop))
+
+        self.chunk(b"fcTL", struct.pack(">IIIIIHHBB", self.sequence, width, height, 0, 0, self.duration, 1000, 0, 0))
+        self.sequence += 1
+        if not self.frames:
+            self.chunk(b"IDAT", data)
+        else:
+            self.chunk(b"fdAT", struct.pack(">I", self.sequence) + data)
+            self.sequence += 1
+        self.frames += 1
+
+    def close(self):
+        if self.frames:
+            self.chunk(b"IEND", b"")
+            self.file.seek(self.actl)
+            self.chunk(b"acTL", struct.pack(">II", self.frames, self.loop))
+        self.file.close()
+
+writers = {"gif": GifWriter, "png": ApngWriter, "apng": ApngWriter}
+
+# Stav procesu v poolu, renderer a kodér se vytvoří jednou pro všechny snímky
+worker_frames: RasterRenderer | None = None
+worker_encode = None
+
+def init_worker(frames: RasterRenderer, encode):
+    global worker_frames, worker_encode
+    worker_frames, worker_encode = frames, encode
+
+def render_frame(store: GeometryStore, extent, duration: int, loop: int):
+    worker_frames.extent = extent
+    return worker_encode(worker_frames.draw(store), duration, loop)
+
+class Animation:
+    """Renderer that appends every rendered store as a frame of an animation at `path`."""
+
+    def __init__(self, path: str, duration: int = 100, loop: int = 0, frames: RasterRenderer | None = None, workers: int | None = None):
+        self.path = path
+        self.duration = duration # ms na snímek
+        self.loop = loop # 0 = opakovat stále
+        self.frames = frames or RasterRenderer()
+        self.workers = workers # počet procesů, None = kreslit v hlavním procesu
+        self.writer = None
+        self.fixed_extent = False
+        self.pool: ProcessPoolExecutor | None = None
+        self.pending: deque[Future] = deque()
+
+    @property
+    def extent(self):
+        return self.frames.extent
+
+    def open(self):
+        format = self.path.rsplit(".", 1)[-1].lower()
+        if format not in writers:
+            raise ValueError(f"Unknown animation format: {format}")
+        self.writer = writers[format](self.path, self.duration, self.loop)
+        if self.workers:
+            self.pool = ProcessPoolExecutor(self.workers, initializer=init_worker, initargs=(self.frames, self.writer.encode))
+
+    def render(self, store: GeometryStore, path: str | None = None):
+        if self.writer is None:
+            self.open()
+        if self.frames.extent is None and len(store):
+            # Výřez podle prvního snímku, aby se pohyb geometrií neztratil přizpůsobením
+            self.frames.extent = store.extent()
+            self.fixed_extent = True
+
+        if self.pool is None:
+            self.writer.write(self.frames.draw(store))
+            return
+
+        # Úložiště se mezi snímky mění na místě, do procesu jde jeho kopie
+        self.pending.append(self.pool.submit(render_frame, store.snapshot(), self.frames.extent, self.duration, self.loop))
+        while len(self.pending) > 2 * self.workers:
+            self.writer.write_encoded(self.pending.popleft().result())
+
+    def close(self):
+        try:
+            while self.pending:
+                self.writer.write_encoded(self.pending.popleft().result())
+        finally:
+            for future in self.pending:
+                future.cancel()
+            self.pending.clear()
+            if self.pool is not None:
+                self.pool.shutdown()
+                self.pool = None
+            if self.writer is not None:
+                self.writer.close()
+                self.writer = None
+        if self.fixed_extent:
+            self.frames.extent = None
+            self.fixed_extent = False
+
+    def __enter__(self) -> "Animation":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
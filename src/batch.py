@@ -0,0 +1,142 @@
+"""
+Runs many PolyDraw scripts in a pool of worker processes.
+
+Every worker imports the parser and the renderer once and renders a small script to
+warm up, then runs scripts one after another. A script that fails is reported with its
+error and the worker goes on with the next one. Plots of a script are saved to
+`<output directory>/<script path>.<format>`, where the path is relative to the directory
+all scripts share, so scripts with the same name in different directories do not
+overwrite each other. A later plot overwrites an earlier one just like with the
+default renderer.
+"""
+
+import os
+import tempfile
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator
+
+renderer_formats = {"matplotlib": "jpg", "raster": "png"}
+
+warm_up_script = """
+polygon p:
+    points = (0 0, 1 1, 1 0)
+    color = (255, 0, 0)
+
+circle c:
+    center = (0 0)
+    radius = 1
+    color = (0, 0, 255)
+
+list l:
+    [p, c]
+
+rotate l: angle = 10 origin = center
+
+plot l
+"""
+
+# Stav procesu v poolu
+worker_renderer = None
+worker_counter = None
+worker_output = "."
+worker_format = "jpg"
+worker_cache = None
+
+def read_manifest(path: str) -> list[str]:
+    """Script paths listed in a manifest, one per line, relative to the manifest. Lines starting with # are skipped."""
+    directory = os.path.dirname(os.path.abspath(path))
+    with open(path, encoding="utf-8") as file:
+        lines = [line.strip() for line in file]
+    return [os.path.join(directory, line) for line in lines if line and not line.startswith("#")]
+
+def make_renderer(renderer: str):
+    if renderer == "raster":
+        from src.raster import RasterRenderer
+        return RasterRenderer()
+    from src.render import Renderer
+    return Renderer(headless=True)
+
+class CountingRenderer:
+    # Počítá vykreslení, aby bylo poznat, jestli skript něco vykreslil
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.renders = 0
+
+    @property
+    def extent(self):
+        return self.renderer.extent
+
+    def render(self, store, path=None):
+        self.renderer.render(store, path)
+        self.renders += 1
+
+def init_worker(renderer: str, output: str, cache: bool = False):
+    global worker_renderer, worker_counter, worker_output, worker_format, worker_cache
+    from src.cache import ProgramCache
+    from src.parser import parse_commands
+    from src.render import set_renderer
+
+    worker_renderer = make_renderer(renderer)
+    worker_output = output
+    worker_format = renderer_formats[renderer]
+    worker_cache = ProgramCache() if cache else None
+    worker_counter = CountingRenderer(worker_renderer)
+    set_renderer(worker_counter)
+    # První vykreslení načte zbytek knihoven a připraví figuru, aby to nezdrželo první skript
+    with tempfile.TemporaryDirectory() as directory:
+        worker_renderer.path = os.path.join(directory, f"warm_up.{worker_format}")
+        parse_commands(warm_up_script, {})
+
+def output_names(scripts: list[str]) -> list[str]:
+    """Unique names of the outputs of scripts: their paths without extension relative to the directory they share."""
+    paths = [os.path.abspath(script) for script in scripts]
+    base = os.path.commonpath([os.path.dirname(path) for path in paths]) if paths else ""
+    names, seen = [], set()
+    for path in paths:
+        name = stem = os.path.splitext(os.path.relpath(path, base))[0]
+        # Skript uvedený víckrát dostane číslovaný výstup
+        count = 1
+        while name in seen:
+            count += 1
+            name = f"{stem}-{count}"
+        seen.add(name)
+        names.append(name)
+    return names
+
+def run_script(path: str, name: str) -> dict:
+    """Runs one script in a worker; returns its path, time, output and error or None."""
+    from src.cache import run_cached
+    from src.parser import parse_commands
+
+    start = time.perf_counter()
+    renders = worker_counter.renders
+    worker_renderer.path = os.path.join(worker_output, f"{name}.{worker_format}")
+    worker_renderer.extent = None
+    os.makedirs(os.path.dirname(worker_renderer.path), exist_ok=True)
+    try:
+        # Stejně jako jeden skript v hlavním procesu se jména zkontrolují před provedením
+        with open(path, encoding="utf-8") as file:
+            code = file.read()
+        if worker_cache is None:
+            parse_commands(code, {})
+        else:
+            run_cached(code, {}, worker_cache)
+    except Exception as error:
+        return {"script": path, "seconds": time.perf_counter() - start, "output": None, "error": f"{type(error).__name__}: {error}", "traceback": traceback.format_exc()}
+    output = worker_renderer.path if worker_counter.renders > renders else None
+    return {"script": path, "seconds": time.perf_counter() - start, "output": output, "error": None}
+
+def run_batch(scripts: list[str], workers: int | None = None, output: str = ".", renderer: str = "matplotlib", cache: bool = False) -> Iterator[dict]:
+    """
+    Runs scripts in `workers` warm processes and yields their results in order of completion.
+    With `cache` parsed scripts are loaded from and stored to the on-disk program cache.
+    """
+    if renderer not in renderer_formats:
+        raise ValueError(f"Unknown renderer: {renderer}")
+    os.makedirs(output, exist_ok=True)
+    with ProcessPoolExecutor(workers or os.cpu_count(), initializer=init_worker, initargs=(renderer, output, cache)) as pool:
+        futures = [pool.submit(run_script, script, name) for script, name in zip(scripts, output_names(scripts))]
+        for future in as_completed(futures):
+            yield future.result()
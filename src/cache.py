@@ -0,0 +1,117 @@
+"""
+On-disk cache of compiled programs, so unchanged scripts are not parsed again.
+
+A compiled program is the list of parsed statements. Its structure is saved as JSON and
+all coordinate arrays as one float64 `.npy` file, which is memory-mapped when loaded.
+Cache files are keyed by the hash of the script and the PolyDraw version.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Callable
+
+import numpy as np
+
+from src import __version__, parser
+from src.symbols import SymbolTable, resolve
+
+def default_directory() -> str:
+    return os.environ.get("POLYDRAW_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "polydraw"))
+
+def cache_key(code: str) -> str:
+    return hashlib.sha256(f"{__version__}\0{code}".encode()).hexdigest()
+
+def encode(value: Any, arrays: list[np.ndarray], size: list[int]) -> Any:
+    # Pole se nahradí odkazem (začátek, konec, tvar) do společného bufferu
+    if isinstance(value, np.ndarray):
+        arrays.append(value.astype(np.float64).ravel())
+        start = size[0]
+        size[0] += value.size
+        return {"__array__": [start, size[0], list(value.shape)]}
+    if isinstance(value, dict):
+        return {key: encode(item, arrays, size) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return {"__tuple__": [encode(item, arrays, size) for item in value]}
+    if isinstance(value, list):
+        return [encode(item, arrays, size) for item in value]
+    return value
+
+def decode(value: Any, buffer: np.ndarray) -> Any:
+    if isinstance(value, dict):
+        if "__array__" in value:
+            start, stop, shape = value["__array__"]
+            return buffer[start:stop].reshape(shape)
+        if "__tuple__" in value:
+            return tuple(decode(item, buffer) for item in value["__tuple__"])
+        return {key: decode(item, buffer) for key, item in value.items()}
+    if isinstance(value, list):
+        return [decode(item, buffer) for item in value]
+    return value
+
+class ProgramCache:
+    def __init__(self, directory: str | None = None):
+        self.directory = directory or default_directory()
+        self.hits = 0
+        self.misses = 0
+
+    def paths(self, code: str) -> tuple[str, str]:
+        base = os.path.join(self.directory, cache_key(code))
+        return base + ".json", base + ".npy"
+
+    def load(self, code: str) -> list[dict] | None:
+        structure_path, arrays_path = self.paths(code)
+        try:
+            with open(structure_path, encoding="utf-8") as file:
+                structure = json.load(file)
+            buffer = np.load(arrays_path, mmap_mode="r") if structure["arrays"] else np.empty(0)
+        except (OSError, ValueError, KeyError):
+            return None
+        return decode(structure["statements"], buffer)
+
+    def save(self, code: str, statements: list[dict]):
+        structure_path, arrays_path = self.paths(code)
+        arrays, size = [], [0]
+        structure = {"version": __version__, "arrays": 0, "statements": encode(statements, arrays, size)}
+        structure["arrays"] = size[0]
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Soubory se zapíší pod dočasným jménem a přejmenují, JSON až jako poslední
+        if arrays:
+            self.write(arrays_path, lambda file: np.save(file, np.concatenate(arrays)))
+        self.write(structure_path, lambda file: file.write(json.dumps(structure, separators=(",", ":")).encode()))
+
+    def write(self, path: str, write: Callable):
+        # Každý zápis má vlastní dočasný soubor, procesy ukládající týž skript si ho nepřepíšou
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                write(file)
+            os.replace(temporary, path)
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+    def compile(self, code: str) -> list[dict]:
+        """Returns the parsed statements of `code`, from the cache if it has them."""
+        statements = self.load(code)
+        if statements is not None:
+            self.hits += 1
+            return statements
+        self.misses += 1
+        # Přes modul, aby volání viděl i Profiler, který funkce parseru nahrazuje
+        statements = parser.parse_program(code)
+        self.save(code, statements)
+        return statements
+
+def run_cached(code: str, variables: dict | None = None, cache: ProgramCache | None = None) -> dict:
+    """Like `parse_commands`, but the parsed program is loaded from the on-disk cache when possible."""
+    variables = {} if variables is None else variables
+    statements = (cache or ProgramCache()).compile(code)
+    # Jména se zkontrolují dřív, než se cokoli provede, stejně jako v `parse_commands`
+    resolve(statements, variables.keys())
+    symbols = SymbolTable(variables)
+    for statement in statements:
+        parser.execute(statement, symbols)
+    return variables
@@ -0,0 +1,252 @@
+"""
+Long-running render service for interactive previews.
+
+The service listens on a Unix socket or a localhost TCP port. A client sends the text of
+a script and gets back the image of its last plot. Both directions use frames of
+a 4-byte big-endian length followed by the payload; a reply payload starts with one
+status byte, 0 for an image and 1 for an error message in UTF-8.
+
+Scripts are parsed, evaluated and rendered in a pool of worker processes, so requests
+do not block each other or the event loop. Every worker keeps a warm headless renderer
+and the parsed programs it has run, keyed by the hash of the script.
+
+The service runs scripts of any client that can connect, so TCP is accepted only on a
+loopback address and scripts with commands that read or write files (`load`, `save`
+and `repeat ... output =`) are rejected.
+"""
+
+import asyncio
+import io
+import ipaddress
+import os
+import struct
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from src.batch import make_renderer, renderer_formats, warm_up_script
+
+OK = 0
+ERROR = 1
+# Největší přijatý rámec v bajtech
+MAX_FRAME = 64 * 2 ** 20
+# Počet rozparsovaných programů, které si jeden proces pamatuje
+MAX_PROGRAMS = 256
+
+# Stav procesu v poolu
+worker_capture = None
+worker_programs: OrderedDict[str, list[dict]] = OrderedDict()
+
+class CaptureRenderer:
+    # Vykresluje do paměti místo do souboru, ponechá si obrázek posledního vykreslení
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.image: bytes | None = None
+
+    @property
+    def extent(self):
+        return self.renderer.extent
+
+    def render(self, store, path=None):
+        buffer = io.BytesIO()
+        self.renderer.render(store, buffer)
+        self.image = buffer.getvalue()
+
+def init_worker(renderer: str):
+    global worker_capture
+    from src.render import set_renderer
+
+    inner = make_renderer(renderer)
+    inner.format = renderer_formats[renderer]
+    worker_capture = CaptureRenderer(inner)
+    set_renderer(worker_capture)
+    render_script(warm_up_script)
+    worker_programs.clear()
+
+def file_commands(statements: list[dict]) -> set[str]:
+    # Příkazy skriptu, které sahají na soubory, včetně těl cyklů
+    found = set()
+    for parsed in statements:
+        if parsed["command"] in ("load", "save"):
+            found.add(parsed["command"])
+        elif parsed["command"] == "repeat":
+            if parsed.get("output"):
+                found.add("repeat output")
+            found |= file_commands(parsed["body"])
+    return found
+
+def program(code: str) -> tuple[list[dict], bool]:
+    """Parsed and resolved statements of `code`, and whether they were cached."""
+    from src.cache import cache_key
+    from src.parser import parse_program
+    from src.symbols import resolve
+
+    key = cache_key(code)
+    if key in worker_programs:
+        worker_programs.move_to_end(key)
+        return worker_programs[key], True
+    statements = parse_program(code)
+    found = file_commands(statements)
+    if found:
+        raise ValueError(f"Commands working with files are not allowed in the render service: {', '.join(sorted(found))}")
+    resolve(statements, set())
+    worker_programs[key] = statements
+    if len(worker_programs) > MAX_PROGRAMS:
+        worker_programs.popitem(last=False)
+    return statements, False
+
+def render_script(code: str) -> dict:
+    """Runs a script in a worker; returns the image of its last plot or an error."""
+    from src.parser import execute
+    from src.symbols import SymbolTable
+
+    worker_capture.image = None
+    try:
+        statements, cached = program(code)
+        symbols = SymbolTable({})
+        for statement in statements:
+            execute(statement, symbols)
+    except Exception as error:
+        # Výjimky parseru nejdou vždy přenést mezi procesy, posílá se jen text
+        return {"image": None, "cached": False, "error": f"{type(error).__name__}: {error}"}
+    if worker_capture.image is None:
+        return {"image": None, "cached": cached, "error": "Script has no plot"}
+    return {"image": worker_capture.image, "cached": cached, "error": None}
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+def parse_address(address: str) -> tuple[str, int] | str:
+    # `host:port` je TCP, cokoli jiného cesta k Unix socketu
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit():
+        host = host.removeprefix("[").removesuffix("]")
+        if not is_loopback(host):
+            raise ValueError(f"Render service listens only on a loopback address, not {host}")
+        return host, int(port)
+    return address
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes | None:
+    try:
+        header = await reader.readexactly(4)
+    except asyncio.IncompleteReadError:
+        return None
+    (length,) = struct.unpack(">I", header)
+    if length > MAX_FRAME:
+        raise ValueError(f"Frame of {length} bytes is over the limit of {MAX_FRAME}")
+    return await reader.readexactly(length)
+
+def frame(payload: bytes) -> bytes:
+    return struct.pack(">I", len(payload)) + payload
+
+class RenderService:
+    def __init__(self, workers: int | None = None, renderer: str = "matplotlib"):
+        if renderer not in renderer_formats:
+            raise ValueError(f"Unknown renderer: {renderer}")
+        self.workers = workers or os.cpu_count()
+        self.renderer = renderer
+        self.pool: ProcessPoolExecutor | None = None
+        self.server: asyncio.AbstractServer | None = None
+        self.address: tuple[str, int] | str | None = None
+
+    async def start(self, address: str):
+        loop = asyncio.get_running_loop()
+        self.pool = ProcessPoolExecutor(self.workers, initializer=init_worker, initargs=(self.renderer,))
+        # Procesy se spustí a zahřejí hned, ne až s prvními požadavky
+        await asyncio.gather(*(loop.run_in_executor(self.pool, os.getpid) for _ in range(self.workers)))
+        self.address = parse_address(address)
+        if isinstance(self.address, tuple):
+            self.server = await asyncio.start_server(self.handle, *self.address)
+        else:
+            self.server = await asyncio.start_unix_server(self.handle, self.address)
+
+    async def render(self, code: str) -> dict:
+        return await asyncio.get_running_loop().run_in_executor(self.pool, render_script, code)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # Jedno spojení může poslat libovolně mnoho požadavků za sebou
+        try:
+            while True:
+                try:
+                    payload = await read_frame(reader)
+                except ValueError as error:
+                    writer.write(frame(bytes([ERROR]) + str(error).encode()))
+                    break
+                if payload is None:
+                    break
+                try:
+                    result = await self.render(payload.decode("utf-8"))
+                except UnicodeDecodeError as error:
+                    result = {"image": None, "error": f"{type(error).__name__}: {error}"}
+                if result["error"] is None:
+                    writer.write(frame(bytes([OK]) + result["image"]))
+                else:
+                    writer.write(frame(bytes([ERROR]) + result["error"].encode()))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve_forever(self):
+        await self.server.serve_forever()
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            if isinstance(self.address, str) and os.path.exists(self.address):
+                os.remove(self.address)
+        if self.pool is not None:
+            self.pool.shutdown()
+
+async def serve(address: str, workers: int | None = None, renderer: str = "matplotlib"):
+    service = RenderService(workers, renderer)
+    await service.start(address)
+    try:
+        await service.serve_forever()
+    finally:
+        await service.stop()
+
+class RenderClient:
+    """Connection to a render service, requests on one connection are answered in order."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, address: str) -> "RenderClient":
+        address = parse_address(address)
+        if isinstance(address, tuple):
+            return cls(*await asyncio.open_connection(*address))
+        return cls(*await asyncio.open_unix_connection(address))
+
+    async def render(self, code: str) -> bytes:
+        """Returns the image of the last plot of `code`, raises ValueError when the script fails."""
+        self.writer.write(frame(code.encode("utf-8")))
+        await self.writer.drain()
+        reply = await read_frame(self.reader)
+        if reply is None:
+            raise ConnectionError("Render service closed the connection")
+        if reply[0] != OK:
+            raise ValueError(reply[1:].decode("utf-8"))
+        return reply[1:]
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+def render(address: str, code: str) -> bytes:
+    """Renders one script by a running service, for clients without an event loop."""
+    async def request() -> bytes:
+        client = await RenderClient.connect(address)
+        try:
+            return await client.render(code)
+        finally:
+            await client.close()
+    return asyncio.run(request())
@@ -0,0 +1,129 @@
+"""
+Reads and writes geometry stores as binary files, without printing them to DSL text.
+
+`.npz` holds the arrays of a GeometryStore (coords, offsets, kinds, colors and rings),
+so circles stay analytic and colors are kept. It is written uncompressed and its arrays
+are memory-mapped on load, copy-on-write, so transforms do not touch the file.
+`.npy` holds plain coordinates: an array (N, 2) is N points, an array (N, K, 2) is N
+lines, or N polygons when the first and last vertex of every row are equal.
+`.wkb` holds one WKB geometry collection readable by other GIS tools; circles are
+tessellated and colors are not stored.
+"""
+
+import os
+import struct
+import zipfile
+
+import numpy as np
+import shapely
+
+from src.store import GeometryStore, POINT, LINE, POLYGON, CIRCLE
+
+DEFAULT_COLOR = (0, 0, 0)
+
+# Druhy geometrií WKB, které mají odpovídající druh v úložišti
+wkb_kinds = {shapely.GeometryType.POINT: POINT, shapely.GeometryType.LINESTRING: LINE, shapely.GeometryType.LINEARRING: LINE, shapely.GeometryType.POLYGON: POLYGON}
+
+def extension(path: str) -> str:
+    return os.path.splitext(path)[1].lower()
+
+def memory_map(path: str, offset: int = 0) -> np.ndarray:
+    # Pole ve formátu .npy začínající na pozici `offset`, zápisy zůstanou jen v paměti
+    with open(path, "rb") as file:
+        file.seek(offset)
+        version = np.lib.format.read_magic(file)
+        read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+        shape, fortran_order, dtype = read_header(file)
+        start = file.tell()
+    if not np.prod(shape):
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="c", offset=start, shape=shape, order="F" if fortran_order else "C")
+
+def read_npz(path: str) -> dict[str, np.ndarray]:
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as file:
+        for info in archive.infolist():
+            name = info.filename.removesuffix(".npy")
+            if info.compress_type != zipfile.ZIP_STORED:
+                # Komprimovaná pole nejdou namapovat, načtou se celá
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member)
+                continue
+            # Data začínají za lokální hlavičkou souboru v archivu
+            file.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack("<HH", file.read(4))
+            arrays[name] = memory_map(path, info.header_offset + 30 + name_length + extra_length)
+    return arrays
+
+def read_npy(path: str) -> GeometryStore:
+    coords = memory_map(path)
+    if coords.ndim == 2 and coords.shape[1] == 2:
+        count, size, kind = len(coords), 1, POINT
+    elif coords.ndim == 3 and coords.shape[2] == 2:
+        count, size = coords.shape[:2]
+        closed = size > 3 and np.array_equal(coords[:, 0], coords[:, -1])
+        kind = POLYGON if closed else LINE
+    else:
+        raise ValueError(f"Coordinates must have shape (N, 2) or (N, K, 2), not {coords.shape}")
+    offsets = np.arange(count + 1, dtype=np.int64) * size
+    colors = np.broadcast_to(np.array(DEFAULT_COLOR, dtype=np.uint8), (count, 3)).copy()
+    return GeometryStore(coords.reshape(-1, 2), offsets, np.full(count, kind, dtype=np.uint8), colors)
+
+def read_wkb(path: str) -> GeometryStore:
+    with open(path, "rb") as file:
+        geometry = shapely.from_wkb(file.read())
+    # Kolekce i vícečetné geometrie se rozloží na jednoduché části
+    parts = shapely.get_parts(shapely.get_parts(geometry))
+    types = shapely.get_type_id(parts)
+    unknown = set(types.tolist()) - set(wkb_kinds)
+    if unknown:
+        raise ValueError(f"Unsupported WKB geometry types: {sorted(shapely.GeometryType(value).name for value in unknown)}")
+    kinds = np.array([wkb_kinds[value] for value in types.tolist()], dtype=np.uint8)
+    return GeometryStore.from_geometries(parts, kinds, np.tile(np.array(DEFAULT_COLOR, dtype=np.uint8), (len(parts), 1)))
+
+def read_store(path: str) -> GeometryStore:
+    """Reads a store from a `.npz`, `.npy` or `.wkb` file, NumPy files are memory-mapped."""
+    match extension(path):
+        case ".npz":
+            arrays = read_npz(path)
+            return GeometryStore(arrays["coords"], arrays["offsets"], arrays["kinds"], arrays["colors"], arrays.get("rings"))
+        case ".npy":
+            return read_npy(path)
+        case ".wkb":
+            return read_wkb(path)
+        case format:
+            raise ValueError(f"Unknown geometry file format: {format}")
+
+def write_npy(store: GeometryStore, path: str):
+    sizes = np.diff(store.offsets)
+    if store.has_holes() or (store.kinds == CIRCLE).any() or len(set(store.kinds.tolist())) > 1 or len(set(sizes.tolist())) > 1:
+        raise ValueError("Only geometries of one kind with the same number of vertices can be saved to .npy, use .npz")
+    if len(store) and store.kinds[0] == POINT:
+        np.save(path, store.coords)
+    else:
+        np.save(path, store.coords.reshape(len(store), -1, 2))
+
+def write_wkb(store: GeometryStore, path: str):
+    geometries = store.geometries()
+    with open(path, "wb") as file:
+        file.write(shapely.to_wkb(shapely.geometrycollections(geometries)))
+
+def write_store(store: GeometryStore, path: str):
+    """Writes a store to a `.npz`, `.npy` or `.wkb` file."""
+    # Zápis pod dočasným jménem, soubor může být právě namapovaný úložištěm, které se ukládá
+    base, format = os.path.splitext(path)
+    temporary = f"{base}.tmp{format}"
+    match format.lower():
+        case ".npz":
+            # Nekomprimovaně, aby šel soubor při načtení namapovat
+            arrays = {"coords": store.coords, "offsets": store.offsets, "kinds": store.kinds, "colors": store.colors}
+            if store.has_holes():
+                arrays["rings"] = store.rings
+            np.savez(temporary, **arrays)
+        case ".npy":
+            write_npy(store, temporary)
+        case ".wkb":
+            write_wkb(store, temporary)
+        case _:
+            raise ValueError(f"Unknown geometry file format: {format}")
+    os.replace(temporary, path)
@@ -0,0 +1,41 @@
+"""
+Spatial index over the rows of a GeometryStore.
+
+The STRtree is built over the bounding boxes of the rows, so building it does not create
+any shapely geometry of the rows. It is rebuilt lazily on the first query after the
+coordinates of the store have changed.
+"""
+
+import numpy as np
+import shapely
+
+from src.store import GeometryStore
+
+class SpatialIndex:
+    def __init__(self, store: GeometryStore):
+        self.store = store
+        self.tree: shapely.STRtree | None = None
+        self.generation = -1
+        self.builds = 0
+
+    def current(self) -> shapely.STRtree:
+        if self.tree is None or self.generation != self.store.generation:
+            bounds = self.store.bounds()
+            self.tree = shapely.STRtree(shapely.box(bounds[:, 0], bounds[:, 1], bounds[:, 2], bounds[:, 3]))
+            self.generation = self.store.generation
+            self.builds += 1
+        return self.tree
+
+    def candidates(self, box: tuple[float, float, float, float]) -> np.ndarray:
+        # Řádky, jejichž obálka protíná obdélník (minx, miny, maxx, maxy), vzestupně
+        return np.sort(self.current().query(shapely.box(*box)))
+
+    def intersecting(self, box: tuple[float, float, float, float]) -> np.ndarray:
+        # Řádky, jejichž geometrie obdélník skutečně protíná
+        rows = self.candidates(box)
+        return rows[shapely.intersects(self.store.take(rows).geometries(), shapely.box(*box))]
+
+    def visible(self, extent: tuple[np.ndarray, np.ndarray]) -> GeometryStore:
+        # Úložiště jen s řádky, které zasahují do výřezu (min, max)
+        (minx, miny), (maxx, maxy) = extent
+        return self.store.take(self.candidates((minx, miny, maxx, maxy)))
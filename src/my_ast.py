@@ -1,149 +1,582 @@
-from shapely.geometry import Point, LineString, Polygon
-from shapely.affinity import translate, rotate, scale
+from typing import Any, Callable
 
-import matplotlib.pyplot as plt
+import numpy as np
+import shapely
+from shapely.geometry import Point, LineString, Polygon
+from src.affine import operation_matrix, origin_matrix, origins, is_fixed_origin, apply_matrix, compose_effects, bounds_centers
+from src.store import GeometryStore, POINT, LINE, POLYGON, CIRCLE, circle_control, circle_polygon
+from src.index import SpatialIndex
+from src.formats import write_store
+from src.render import Renderer, get_renderer, set_renderer
 
 class ASTNode:
+    __slots__ = ()
+
     def evaluate(self):
         raise NotImplementedError
+
+    def compile(self) -> Callable[[], Any]:
+        # Funkce bez argumentů se stejným účinkem jako `evaluate`, rozhodnutí závislá jen
+        # na stavbě uzlu se udělají jednou tady a ne při každém provedení
+        return self.evaluate
     
     def set_geometry(self, geometry: "ASTNode"):
         raise NotImplementedError
 
-class PointNode(ASTNode):
-    def __init__(self, xy: tuple[float], color=None):
+    def affine_effect(self) -> tuple[list["ASTNode"], np.ndarray] | None:
+        # Uzly geometrií a jejich afinní matice, None pokud uzel není čistě afinní transformace
+        return None
+
+# Měření geometrií, jejichž výsledky si uzly pamatují
+measures = {"area": shapely.area, "length": shapely.length, "bounds": shapely.bounds, "centroid": shapely.centroid}
+# Zásahy a výpadky cache měření, pro ladění
+measure_stats = {"hits": 0, "misses": 0}
+
+def reset_measure_stats():
+    measure_stats["hits"] = measure_stats["misses"] = 0
+
+class GeometryNode(ASTNode):
+    # Geometrie s odloženou afinní transformací, souřadnice se přepočítají až při čtení.
+    # Uzel připojený ke GeometryStore je jen pohledem na řádek úložiště a nedrží vlastní geometrii.
+    # `version` roste s každou změnou geometrie, měření se pamatují v `cache` podle verze.
+    __slots__ = ("_color", "geometry", "pending", "store", "index", "version", "cache")
+    kind: int
+
+    def __init__(self, geometry, color=None):
+        self.store: GeometryStore | None = None
+        self.index = -1
         self.color = color
-        self.point = Point(xy[0], xy[1])
+        self.geometry = geometry
+        self.pending: np.ndarray | None = None
+        self.version = 0
+        self.cache: dict | None = None
+
+    @classmethod
+    def view(cls, store: GeometryStore, index: int) -> "GeometryNode":
+        node = cls.__new__(cls)
+        node.geometry = node.pending = node._color = node.cache = None
+        node.version = 0
+        node.attach(store, index)
+        return node
+
+    def cache_key(self) -> tuple:
+        # Řádek úložiště se může změnit i hromadnou transformací celého úložiště
+        return (self.version, None) if self.store is None else (self.version, self.store, self.store.versions[self.index])
+
+    def cached(self, measure: str):
+        if self.cache is not None:
+            entry = self.cache.get(measure)
+            if entry is not None and entry[0] == self.cache_key():
+                measure_stats["hits"] += 1
+                return entry[1]
+        return None
+
+    def remember(self, measure: str, value):
+        measure_stats["misses"] += 1
+        if self.cache is None:
+            self.cache = {}
+        self.cache[measure] = (self.cache_key(), value)
+
+    def measure(self, measure: str):
+        value = self.cached(measure)
+        if value is None:
+            value = measures[measure](self.evaluate())
+            self.remember(measure, value)
+        return value
+
+    @property
+    def color(self):
+        return self._color if self.store is None else self.store.colors[self.index].tolist()
+
+    @color.setter
+    def color(self, color):
+        if self.store is None:
+            self._color = color
+        else:
+            self.store.colors[self.index] = color
 
     def evaluate(self):
-        return self.point
-    
-    def set_geometry(self, geometry: Point):
-        self.point = geometry
-    
+        return self.stored()
+
+    def stored(self):
+        # Geometrie tak, jak je uložená, u kružnice jen její řídicí body
+        if self.store is not None:
+            return self.store.geometry(self.index)
+        if self.pending is not None:
+            self.geometry = apply_matrix(self.geometry, self.pending)
+            self.pending = None
+        return self.geometry
+
+    def set_geometry(self, geometry):
+        self.version += 1
+        if self.store is not None and self.store.write(self.index, geometry):
+            return
+        self.detach()
+        self.geometry = geometry
+        self.pending = None
+
+    def apply_transform(self, matrix: np.ndarray):
+        self.version += 1
+        if self.store is not None:
+            # Řádek úložiště se přepíše rovnou, nevzniká žádný objekt shapely
+            self.store.transform(matrix, self.index)
+        else:
+            self.pending = matrix if self.pending is None else matrix @ self.pending
+
+    def attach(self, store: GeometryStore, index: int):
+        self.store, self.index = store, index
+        self.geometry = self.pending = self._color = None
+        store.attached += 1
+
+    def detach(self):
+        # Uzel si vezme vlastní kopii geometrie a barvy a přestane být pohledem do úložiště
+        if self.store is not None:
+            geometry, color = self.stored(), self.color
+            self.store.attached -= 1
+            self.store, self.index = None, -1
+            self.geometry, self._color = geometry, color
+
+def materialize(nodes: list[ASTNode]):
+    # Odložené transformace všech uzlů se provedou jedním dávkovým voláním
+    pending = list({id(node): node for node in nodes if isinstance(node, GeometryNode) and node.pending is not None}.values())
+    if pending:
+        geometries = apply_matrix(np.array([node.geometry for node in pending], dtype=object), np.stack([node.pending for node in pending]))
+        set_geometries(pending, geometries)
+
+def geometry_array(nodes: list[ASTNode]) -> np.ndarray:
+    materialize(nodes)
+    result = np.empty(len(nodes), dtype=object)
+    # Pohledy do úložiště se čtou po úložištích jedním vektorizovaným voláním
+    views: dict[int, list[int]] = {}
+    for position, node in enumerate(nodes):
+        if isinstance(node, GeometryNode) and node.store is not None:
+            views.setdefault(id(node.store), []).append(position)
+        else:
+            result[position] = node.evaluate()
+    for positions in views.values():
+        rows, inverse = np.unique([nodes[position].index for position in positions], return_inverse=True)
+        result[positions] = nodes[positions[0]].store.take(rows).geometries()[inverse]
+    return result
+
+def pack_nodes(nodes: list[ASTNode]) -> GeometryStore:
+    # Nové úložiště se souřadnicemi a barvami uzlů, uzly se k němu nepřipojí
+    nodes = [node for node in nodes if isinstance(node, GeometryNode)]
+    materialize(nodes)
+    colors = [node.color if node.color is not None else (0, 0, 0) for node in nodes]
+    geometries = np.array([node.stored() for node in nodes], dtype=object)
+    return GeometryStore.from_geometries(geometries, [node.kind for node in nodes], colors)
+
+def measure_nodes(nodes: list[GeometryNode], measure: str) -> np.ndarray:
+    # Měření všech uzlů, neplatné výsledky v cache se spočítají jedním vektorizovaným voláním
+    values = [node.cached(measure) for node in nodes]
+    missing = [i for i, value in enumerate(values) if value is None]
+    if missing:
+        computed = measures[measure](geometry_array([nodes[i] for i in missing]))
+        for i, value in zip(missing, computed):
+            nodes[i].remember(measure, value)
+            values[i] = value
+    return np.array(values) if measure != "centroid" else np.array(values, dtype=object)
+
+def set_geometries(nodes: list[ASTNode], geometries: np.ndarray):
+    for node, geometry in zip(nodes, geometries):
+        node.set_geometry(geometry)
+
+def unique_rounds(nodes: list[ASTNode]) -> list[list[ASTNode]]:
+    # Rozdělí seznam na kola bez opakujících se uzlů, výskyty jednoho uzlu zůstanou v pořadí
+    rounds = []
+    seen: dict[int, int] = {}
+    for node in nodes:
+        occurrence = seen.get(id(node), 0)
+        seen[id(node)] = occurrence + 1
+        if occurrence == len(rounds):
+            rounds.append([])
+        rounds[occurrence].append(node)
+    return rounds
+
+class PointNode(GeometryNode):
+    __slots__ = ()
+    kind = POINT
+
+    def __init__(self, xy: tuple[float], color=None):
+        super().__init__(Point(xy[0], xy[1]), color)
+
+    @property
+    def point(self) -> Point:
+        return self.evaluate()
+
     def __str__(self) -> str:
         return f"PointNode({self.point.x}, {self.point.y})"
 
-class LineNode(ASTNode):
-    def __init__(self, points: list[float] = None, start_node: PointNode | tuple[float] = None, end_node: PointNode | tuple[float] = None, color=None):
-        self.color = color
+class LineNode(GeometryNode):
+    __slots__ = ()
+    kind = LINE
+
+    def __init__(self, points: np.ndarray | list[float] = None, start_node: PointNode | tuple[float] = None, end_node: PointNode | tuple[float] = None, color=None):
         coords = points if points is not None else [start_node.evaluate(), end_node.evaluate()]
-        self.line = LineString(coords)
+        super().__init__(LineString(coords), color)
 
-    def evaluate(self):
-        return self.line
+    @property
+    def line(self) -> LineString:
+        return self.evaluate()
 
-    def set_geometry(self, geometry: LineString):
-        self.line = geometry
-    
     def __str__(self) -> str:
         return f"LineNode({self.line.coords})"
 
-class PolygonNode(ASTNode):
-    def __init__(self, points: PointNode | list[tuple[float | int]], color=None):
-        self.color = color
-        cords = [(p.evaluate().x, p.evaluate().y) if isinstance(p, PointNode) else p for p in points]
-        self.polygon = Polygon(cords)
+class PolygonNode(GeometryNode):
+    __slots__ = ()
+    kind = POLYGON
+
+    def __init__(self, points: np.ndarray | list[PointNode | tuple[float | int]], color=None):
+        if isinstance(points, np.ndarray):
+            # Pole (N, 2) z parseru jde do shapely bez převodu na seznam bodů
+            super().__init__(Polygon(points), color)
+        else:
+            cords = [(p.evaluate().x, p.evaluate().y) if isinstance(p, PointNode) else p for p in points]
+            super().__init__(Polygon(cords), color)
+
+    @property
+    def polygon(self) -> Polygon:
+        return self.evaluate()
 
-    def evaluate(self):
-        return self.polygon
-    
-    def set_geometry(self, geometry: Polygon):
-        self.polygon = geometry
-    
     def __str__(self) -> str:
         return f"PolygonNode({list(self.polygon.exterior.coords)})"
 
-class CircleNode(ASTNode):
+def is_circle_control(geometry) -> bool:
+    return geometry.geom_type == "LineString" and shapely.get_num_coordinates(geometry) == 3
+
+class CircleNode(GeometryNode):
     # https://gis.stackexchange.com/questions/190495/getting-intersection-of-circles-using-shapely
+    # Kružnice zůstává jako tři řídicí body (střed, střed + u, střed + v), transformace je
+    # mění přesně i na elipsu, mnohoúhelník vznikne až při čtení geometrie.
+    # Jiná geometrie nastavená přes `set_geometry` kružnici nahradí a vrací se beze změny.
+    __slots__ = ("center", "radius")
+    kinds = {"Point": POINT, "LineString": LINE, "Polygon": POLYGON}
+
     def __init__(self, center, radius, color=None):
-        self.color = color
         self.center = center
         self.radius = radius
-        self.circle = Point(center).buffer(radius)
+        super().__init__(LineString(circle_control(center, radius)), color)
+
+    @classmethod
+    def view(cls, store: GeometryStore, index: int) -> "CircleNode":
+        node = super().view(store, index)
+        control = store.coordinates(index)
+        node.center, node.radius = control[0].tolist(), float(np.hypot(*(control[1] - control[0])))
+        return node
+
+    @property
+    def kind(self) -> int:
+        if self.store is not None:
+            return int(self.store.kinds[self.index])
+        geometry = self.stored()
+        return CIRCLE if is_circle_control(geometry) else self.kinds[geometry.geom_type]
+
+    def stored(self):
+        if self.store is not None and self.store.kinds[self.index] == CIRCLE:
+            return LineString(self.store.coordinates(self.index))
+        return super().stored()
 
     def evaluate(self):
-        # TODO: check functionality
-        return self.circle
-    
-    def set_geometry(self, geometry: Point):
-        self.circle = geometry
-    
+        geometry = self.stored()
+        if not is_circle_control(geometry):
+            return geometry
+        return circle_polygon(shapely.get_coordinates(geometry))
+
+    @property
+    def circle(self) -> Polygon:
+        return self.evaluate()
+
     def __str__(self) -> str:
         return f"CircleNode({self.circle})"
-    
+
 class GeometryListNode(ASTNode):
     def __init__(self) -> None:
         self.geometries = []
-    
+        self.store: GeometryStore | None = None
+        self.index: SpatialIndex | None = None
+
+    @classmethod
+    def from_store(cls, store: GeometryStore) -> "GeometryListNode":
+        geom_list = cls()
+        geom_list.geometries = [node_classes[kind].view(store, index) for index, kind in enumerate(store.kinds.tolist())]
+        geom_list.store = store
+        return geom_list
+
     def add(self, geometry: ASTNode):
         self.geometries.append(geometry)
-    
+
     def evaluate(self):
         return self.geometries
-        
+
+    def pack(self) -> GeometryStore:
+        # Souřadnice a barvy členů se přesunou do jednoho sloupcového úložiště,
+        # členové zůstanou stejné objekty, jen se z nich stanou pohledy do úložiště
+        nodes = list({id(node): node for node in self.geometries}.values())
+        if not all(isinstance(node, GeometryNode) for node in nodes):
+            raise ValueError("Only lists of geometries can be packed")
+        for node in nodes:
+            node.detach()
+
+        self.store = pack_nodes(nodes)
+        for index, node in enumerate(nodes):
+            node.attach(self.store, index)
+        return self.store
+
+    def is_packed(self) -> bool:
+        # Všichni členové jsou právě jednou v úložišti, takže ho lze měnit najednou
+        return self.store is not None and self.store.attached == len(self.store) == len(self.geometries)
+
+    def spatial_index(self) -> SpatialIndex:
+        # Index patří k úložišti, po novém zabalení se vytvoří znovu
+        if self.index is None or self.index.store is not self.store:
+            self.index = SpatialIndex(self.store)
+        return self.index
+
+node_classes = {POINT: PointNode, LINE: LineNode, POLYGON: PolygonNode, CIRCLE: CircleNode}
+
+def member_nodes(nodes: list[ASTNode]) -> list[GeometryNode]:
+    # Geometrie z uzlů a seznamů, seznamy se rozbalí
+    members = []
+    for node in nodes:
+        members.extend(node.geometries if isinstance(node, GeometryListNode) else [node])
+    return members
+
+def member_geometries(nodes: list[GeometryNode]) -> np.ndarray:
+    # Zabalený seznam se čte přímo z úložiště jedním vektorizovaným voláním
+    if len(nodes) == 1 and isinstance(nodes[0], GeometryListNode) and nodes[0].is_packed():
+        return nodes[0].store.geometries()
+    return geometry_array(member_nodes(nodes))
+
+class SetOperationNode(ASTNode):
+    # Sjednocení nebo průnik všech geometrií operandů, výsledek je nový zabalený seznam jeho částí
+    operations = {"union": shapely.union_all, "intersection": shapely.intersection_all}
+    kinds = {0: POINT, 1: LINE, 2: LINE, 3: POLYGON}
+
+    def __init__(self, operands: list[ASTNode], operation: str):
+        if operation not in self.operations:
+            raise ValueError(f"Unknown set operation: {operation}")
+        self.operands = operands
+        self.operation = operation
+
+    def evaluate(self) -> GeometryListNode:
+        geometries = member_geometries(self.operands)
+        # Neplatné polygony (např. s překříženými hranami) se před operací opraví
+        invalid = ~shapely.is_valid(geometries)
+        if invalid.any():
+            geometries[invalid] = shapely.make_valid(geometries[invalid])
+        parts = shapely.get_parts(self.operations[self.operation](geometries))
+        parts = parts[~shapely.is_empty(parts)]
+        kinds = [self.kinds[type_id] for type_id in shapely.get_type_id(parts).tolist()]
+
+        members = member_nodes(self.operands)
+        color = members[0].color if members and members[0].color is not None else (0, 0, 0)
+        return GeometryListNode.from_store(GeometryStore.from_geometries(parts, kinds, [color] * len(parts)))
+
+class MeasureNode(ASTNode):
+    # Obsah nebo obvod každé geometrie operandů, hodnoty zůstanou v `values`.
+    # Nezměněné geometrie se neměří znovu, výsledky jsou v cache uzlů.
+    measures = {"area": "area", "perimeter": "length"}
+
+    def __init__(self, operands: list[ASTNode], measure: str):
+        if measure not in self.measures:
+            raise ValueError(f"Unknown measure: {measure}")
+        self.operands = operands
+        self.measure = measure
+        self.values = np.empty(0)
+
+    def evaluate(self) -> np.ndarray:
+        self.values = measure_nodes(member_nodes(self.operands), self.measures[self.measure])
+        return self.values
+
+    def __str__(self) -> str:
+        return f"MeasureNode({self.measure}, {self.values.tolist()})"
+
+class QueryNode(ASTNode):
+    # Výběr geometrií operandů, které protínají obdélník; výsledek obsahuje tytéž uzly
+    def __init__(self, operands: list[ASTNode], box: tuple[float, float, float, float]):
+        self.operands = operands
+        self.box = box
+
+    def evaluate(self) -> GeometryListNode:
+        selection = GeometryListNode()
+        if len(self.operands) == 1 and isinstance(self.operands[0], GeometryListNode) and self.operands[0].is_packed():
+            geom_list = self.operands[0]
+            rows = geom_list.spatial_index().intersecting(self.box)
+            # Uzly jsou pohledy, pořadí v seznamu se může lišit od pořadí v úložišti
+            by_row = {node.index: node for node in geom_list.geometries}
+            selection.geometries = [by_row[row] for row in rows.tolist()]
+            return selection
+
+        members = member_nodes(self.operands)
+        hits = shapely.intersects(geometry_array(members), shapely.box(*self.box))
+        selection.geometries = [node for node, hit in zip(members, hits) if hit]
+        return selection
+
+class BindNode(ASTNode):
+    # Příkaz s výsledkem, např. `union u: l`: uzel se vyhodnotí při provedení příkazu
+    # a výsledek se přiřadí jménu, v cyklu znovu při každém průchodu
+    def __init__(self, name: str, node: ASTNode, symbols) -> None:
+        self.name = name
+        self.node = node
+        self.symbols = symbols
+
+    def evaluate(self):
+        value = self.node.evaluate()
+        # Měření zůstane uzlem, hodnoty jsou v jeho `values`
+        self.symbols.define(self.name, self.node if isinstance(self.node, MeasureNode) else value)
 
 class TransformNode(ASTNode):
     def __init__(self, geometry_nodes: list[ASTNode] | ASTNode, operation: str, **kwargs):
         self.geometries: list[ASTNode] = geometry_nodes.evaluate() if isinstance(geometry_nodes, GeometryListNode) else [geometry_nodes]
+        self.target = geometry_nodes
         self.operation = operation
         self.kwargs = kwargs["kwargs"] if "kwargs" in kwargs and isinstance(kwargs["kwargs"], dict) else kwargs
+        # Matice nezávislá na tvaru geometrie se sestaví jen jednou
+        self.matrix = operation_matrix(self.operation, self.kwargs) if is_fixed_origin(self.operation, self.kwargs) else None
+        self.step = self.build_step()
 
     def evaluate(self):
-        for geom in self.geometries:
-            base_geom = geom.evaluate()
-            if self.operation == "translate":
-                x = self.kwargs.get("x", 0) # digit
-                y = self.kwargs.get("y", 0) # digit
-                geom.set_geometry(translate(base_geom, xoff=x, yoff=y))
-            elif self.operation == "rotate":
-                angle = self.kwargs.get("angle", 0) # digit
-                origin = self.kwargs.get("origin", "center") # tuple[x, y] or default "center"
-                geom.set_geometry(rotate(base_geom, origin=origin, angle=angle))
-            elif self.operation == "scale":
-                factor = self.kwargs.get("factor", 0.5) # digit
-                origin = self.kwargs.get("origin", "center") # tuple[x, y] or default "center"
-                geom.set_geometry(scale(base_geom, xfact=factor, yfact=factor, origin=origin))
-                            
+        self.step()
+
+    def compile(self):
+        return self.step
+
+    def build_step(self) -> Callable[[], None]:
+        # Větvení podle cíle, operace a počátku se rozhodne jednou při stavbě uzlu,
+        # zabalenost seznamu se ale může změnit, takže se ověřuje při každém provedení
+        target, geometries, matrix = self.target, self.geometries, self.matrix
+        packed = isinstance(target, GeometryListNode)
+
+        if matrix is not None:
+            def transform():
+                if packed and target.is_packed():
+                    # Zabalený seznam se transformuje jedním průchodem přes souvislé pole souřadnic
+                    target.store.transform(matrix)
+                    return
+                # Transformace se jen přidá k odloženým, souřadnice se přepočítají až při čtení
+                for geom in geometries:
+                    geom.apply_transform(matrix)
+            return transform
+
+        build = origin_matrix(self.operation, self.kwargs)
+        origin = self.kwargs.get("origin", "center")
+        center = packed and origin == "center"
+
+        def transform_around_origins():
+            if center and target.is_packed():
+                store = target.store
+                store.transform(build(bounds_centers(store.bounds())))
+                return
+            # Počátek závisí na aktuálním tvaru, matice se spočítají dávkově po kolech bez opakování
+            # a uzly je dostanou jako odloženou transformaci, kružnice tak zůstanou kružnicemi
+            for nodes in unique_rounds(geometries):
+                for node, node_matrix in zip(nodes, build(origins(origin, geometry_array(nodes)))):
+                    node.apply_transform(node_matrix)
+        return transform_around_origins
+
+    def affine_effect(self):
+        return None if self.matrix is None else (self.geometries, self.matrix)
+
     def __str__(self) -> str:
         return f"TransformNode({self.operation}, {self.geometries}, {self.kwargs})"
     
 class RepeatCycleNode(ASTNode):
-    def __init__(self, repetitions: int, body: list[ASTNode]) -> None:
+    def __init__(self, repetitions: int, body: list[ASTNode], animation=None) -> None:
         self.repetitions = repetitions
         self.body = body
+        # Renderer, do kterého se během cyklu kreslí příkazy `plot` jako snímky animace
+        self.animation = animation
+        # Tělo složené jen z afinních transformací se sloučí do jedné matice na geometrii,
+        # vykreslení v těle potřebuje mezistavy, takže se pak cyklus provádí krok po kroku
+        effects = [el.affine_effect() if isinstance(el, ASTNode) else None for el in body]
+        self.effect = None if any(effect is None for effect in effects) else compose_effects(effects, repetitions)
 
     def evaluate(self):
-        for _ in range(self.repetitions):
-            for el in self.body:
-                el.evaluate()
+        self.compile()()
+
+    def compile(self):
+        if self.effect is not None:
+            steps = [(node.apply_transform, matrix) for node, matrix in zip(*self.effect)]
+
+            def apply_effect():
+                for apply_transform, matrix in steps:
+                    apply_transform(matrix)
+            return apply_effect
+
+        # Tělo se přeloží jednou, v cyklu se už jen volají připravené funkce
+        body = [el.compile() for el in self.body]
+        repetitions = range(self.repetitions)
+
+        def run():
+            for _ in repetitions:
+                for step in body:
+                    step()
+
+        if self.animation is None:
+            return run
+
+        animation = self.animation
+
+        def run_animation():
+            previous = get_renderer()
+            set_renderer(animation)
+            try:
+                run()
+            finally:
+                set_renderer(previous)
+                animation.close()
+        return run_animation
+
+    def affine_effect(self):
+        return self.effect
 
 class DrawNode(ASTNode):
-    def __init__(self, geometry_nodes: GeometryListNode | ASTNode) -> None:
+    def __init__(self, geometry_nodes: GeometryListNode | ASTNode, renderer: Renderer | None = None) -> None:
         self.geometries: list[ASTNode] = geometry_nodes.evaluate() if isinstance(geometry_nodes, GeometryListNode) else [geometry_nodes]
-    
+        self.target = geometry_nodes
+        self.renderer = renderer
+        self.step = self.build_step()
+
+    def evaluate(self):
+        self.step()
+
+    def compile(self):
+        return self.step
+
+    def build_step(self) -> Callable[[], None]:
+        store = self.store
+        if self.renderer is not None:
+            renderer = self.renderer
+
+            def draw():
+                renderer.render(store(renderer.extent))
+            return draw
+
+        def draw_current():
+            # Renderer se vybere až při kreslení, v cyklu s animací je jiný než jinde
+            current = get_renderer()
+            current.render(store(current.extent))
+        return draw_current
+
+    def store(self, extent: tuple[np.ndarray, np.ndarray] | None = None) -> GeometryStore:
+        # Zabalený seznam se vykreslí přímo z úložiště, ostatní uzly se zabalí dočasně.
+        # S pevným výřezem se z indexu vyberou jen geometrie, které do něj zasahují.
+        if isinstance(self.target, GeometryListNode) and self.target.is_packed():
+            if extent is not None:
+                return self.target.spatial_index().visible(extent)
+            return self.target.store
+        return pack_nodes(self.geometries)
+
+class SaveNode(ASTNode):
+    # Zápis geometrií do souboru, v cyklu se soubor přepíše při každém průchodu
+    def __init__(self, geometry_nodes: GeometryListNode | ASTNode, path: str) -> None:
+        self.target = geometry_nodes
+        self.path = path
+
     def evaluate(self):
-        fig, ax = plt.subplots()
-        ax.axis('equal')
-        print(len(self.geometries))
-        for geometry in self.geometries:
-            if isinstance(geometry, PolygonNode):
-                x, y = geometry.evaluate().exterior.xy
-                color = geometry.color
-                ax.fill(x, y, alpha=0.5, fc=[c/255 for c in color], ec='k')  # Vyplnění polygonu
-            elif isinstance(geometry, LineNode):
-                x, y = geometry.evaluate().xy
-                color = geometry.color
-                ax.plot(x, y, color=[c/255 for c in color], linestyle="-")
-                # vykresli primku
-            elif isinstance(geometry, PointNode):
-                x, y = geometry.evaluate().xy
-                color = geometry.color
-                ax.plot(x, y, color=[c/255 for c in color], marker='o')
-            elif isinstance(geometry, CircleNode):
-                x, y = geometry.evaluate().exterior.xy
-                color = geometry.color
-                ax.plot(x, y, color=[c/255 for c in color])
-        fig.savefig("./test.jpg")
-        plt.show()
+        write_store(self.store(), self.path)
 
+    def store(self) -> GeometryStore:
+        if isinstance(self.target, GeometryListNode) and self.target.is_packed():
+            return self.target.store
+        return pack_nodes(member_nodes([self.target]))
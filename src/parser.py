@@ -1,170 +1,387 @@
 """
 Parses given input of PolyDraw DSL to AST.
+
+The whole grammar is built once at import time. A script is parsed in a single pass
+to a list of statements (plain dicts), which are then built to AST nodes in order.
 """
 
-from parsy import string, regex ,seq
-from typing import Any
-from src.my_ast import ASTNode, PointNode, LineNode, PolygonNode, CircleNode, GeometryListNode, TransformNode, RepeatCycleNode, DrawNode
+import re
+import numpy as np
+from parsy import Parser, Result, generate, string, regex, seq, eof, fail
+from typing import Any, Callable, Iterable, Iterator
+from src.my_ast import ASTNode, GeometryNode, PointNode, LineNode, PolygonNode, CircleNode, GeometryListNode, TransformNode, RepeatCycleNode, DrawNode, SetOperationNode, MeasureNode, QueryNode, SaveNode, BindNode
+from src.formats import read_store
+from src.symbols import SymbolTable, resolve, statement_names, is_definition
 
 # Tokens
+number = r"-?\d+(?:\.\d+)?"
+numbers = re.compile(number)
+
+def token(pattern: str, convert: Callable = str) -> Parser:
+    # Lexém jako jediný regex včetně následujících mezer, bez skládání kombinátorů
+    exp = re.compile(rf"({pattern})\s*")
+
+    @Parser
+    def token_parser(stream: str, index: int) -> Result:
+        match = exp.match(stream, index)
+        if match is None:
+            return Result.failure(index, pattern)
+        return Result.success(match.end(), convert(match.group(1)))
+
+    return token_parser
+
+def fast_path(fast: Parser, exact: Parser) -> Parser:
+    # Při chybě zopakuje parsování přesným parserem, aby pozice chyby zůstala stejná
+    @Parser
+    def fast_path_parser(stream: str, index: int) -> Result:
+        result = fast(stream, index)
+        return result if result.status else exact(stream, index)
+
+    return fast_path_parser
+
 spaces = regex(r"\s*")
 lexeme = lambda p: p << spaces
-comma = lexeme(string(','))
-l_bracket = lexeme(regex(r"[\(\[]"))
-r_bracket = lexeme(regex(r"[\)\]]"))
-decimal = lexeme(regex(r'-?\d+(\.\d+)?').map(float))
-colon = lexeme(string(':'))
+comma = token(",")
+l_bracket = token(r"[\(\[]")
+r_bracket = token(r"[\)\]]")
+decimal = token(number, float)
+colon = token(":")
 identifier = regex(r'[a-zA-Z_][a-zA-Z0-9_]*')
 identifier_list = l_bracket >> identifier.sep_by(comma) << r_bracket
 
-# Parser pro bod
-point_parser = seq(decimal << spaces, decimal).combine(lambda x, y: [x, y])
+# Parser pro bod, čísla jsou atomické skupiny stejně jako samostatné lexémy `decimal`
+point_parser = fast_path(
+    token(rf"(?>{number})\s*(?>{number})", lambda text: [float(value) for value in numbers.findall(text)]),
+    seq(decimal << spaces, decimal).combine(lambda x, y: [x, y])
+)
+
+# Celý seznam bodů jedním regexem rovnou do pole (N, 2), bez objektů pro jednotlivé body
+point_pattern = rf"(?>{number})\s*(?>{number})\s*"
+bulk_points = re.compile(rf"[\(\[]\s*((?:{point_pattern}(?:,\s*{point_pattern})*)?)[\)\]]\s*")
+
+@Parser
+def bulk_points_list(stream: str, index: int) -> Result:
+    match = bulk_points.match(stream, index)
+    if match is None:
+        return Result.failure(index, "points list")
+    # Záporná čísla mohou být nalepená na předchozí číslo, např. "1-2"
+    values = match.group(1).replace(",", " ").replace("-", " -")
+    coords = np.fromstring(values, sep=" ") if values else np.empty(0)
+    return Result.success(match.end(), coords.reshape(-1, 2))
 
 # Parser pro seznam bodů
-points_list = l_bracket >> point_parser.sep_by(comma) << r_bracket
-color_list = l_bracket >> seq(decimal << (comma | spaces), decimal << (comma | spaces), decimal) << r_bracket
+points_list = fast_path(
+    bulk_points_list,
+    (l_bracket >> point_parser.sep_by(comma) << r_bracket).map(lambda points: np.array(points, dtype=np.float64).reshape(-1, 2))
+)
+color_list = l_bracket >> seq(decimal << comma.optional(), decimal << comma.optional(), decimal) << r_bracket
+
+# "<keyword> <name>:" returns name, "<label> =" returns nothing
+header = lambda keyword: regex(rf"{keyword}\s+([a-zA-Z_][a-zA-Z0-9_]*)\s*:\s*", group=1)
+label = lambda name: regex(rf"{name}\s*=\s*")
+optional_label = lambda name: regex(rf"(?:{name}\s*=\s*)?")
+
+@Parser
+def column(stream: str, index: int) -> Result:
+    # Sloupec, na kterém začíná aktuální příkaz
+    return Result.success(index, index - stream.rfind("\n", 0, index) - 1)
+
+# Statements
+point_def = seq(
+    header("point"),
+    optional_label("coord") >> points_list,
+    label("color") >> color_list
+).combine(lambda name, point, color: {"command": "point", "name": name, "coord": point[0], "color": color})
+
+line_def = seq(
+    header("line"),
+    label("points") >> points_list,
+    label("color") >> color_list
+).combine(lambda name, points, color: {"command": "line", "name": name, "points": points, "color": color})
+
+polygon_def = seq(
+    header("polygon"),
+    label("points") >> points_list,
+    label("color") >> color_list
+).combine(lambda name, points, color: {"command": "polygon", "name": name, "points": points, "color": color})
+
+circle_def = seq(
+    header("circle"),
+    optional_label("center") >> points_list,
+    optional_label("radius") >> decimal,
+    label("color") >> color_list
+).combine(lambda name, center, radius, color: {"command": "circle", "name": name, "center": center[0].tolist(), "radius": radius, "color": color})
+
+list_def = seq(
+    header("list"),
+    identifier_list
+).combine(lambda name, geoms: {"command": "list", "name": name, "geoms": geoms})
+
+transform_def = seq(
+    lexeme(regex(r"translate|scale|rotate")), # transform type
+    lexeme(identifier) << colon, # geometry object or list
+    lexeme(identifier) << lexeme(string("=")), # first argument name
+    decimal, # float value
+    lexeme(identifier) << lexeme(string("=")), # second argument name
+    (l_bracket >> point_parser << r_bracket).map(tuple) | decimal | lexeme(string("center")) # point
+).combine(
+    lambda transform, geom_obj, arg1_name, arg1_value, arg2_name, arg2_value:
+    {"command": "transform", "transform": transform, "obj": geom_obj, "kwargs": {arg1_name: arg1_value, arg2_name: arg2_value}}
+)
+
+# "<operation> <name>: [a, b]" nebo "<operation> <name>: seznam"
+operands = identifier_list | lexeme(identifier).map(lambda name: [name])
+
+set_operation_def = seq(
+    lexeme(regex(r"union|intersection")),
+    lexeme(identifier) << colon,
+    operands
+).combine(lambda operation, name, geoms: {"command": "set_operation", "operation": operation, "name": name, "geoms": geoms})
+
+measure_def = seq(
+    lexeme(regex(r"area|perimeter")),
+    lexeme(identifier) << colon,
+    operands
+).combine(lambda measure, name, geoms: {"command": "measure", "measure": measure, "name": name, "geoms": geoms})
+
+query_def = seq(
+    header("query"),
+    operands,
+    label("box") >> points_list
+).combine(lambda name, geoms, box: {"command": "query", "name": name, "geoms": geoms, "box": box})
+
+# "load <name>: <path>" a "save <name>: <path>", formát podle přípony souboru
+file_path = token(r"\S+")
+
+load_def = seq(
+    header("load"),
+    file_path
+).combine(lambda name, path: {"command": "load", "name": name, "path": path})
+
+save_def = seq(
+    header("save"),
+    file_path
+).combine(lambda name, path: {"command": "save", "name": name, "path": path})
+
+plot_def = lexeme(regex(r"plot\s+([a-zA-Z_][a-zA-Z0-9_]*)", group=1)).map(lambda name: {"command": "plot", "name": name})
+
+def indented(depth: int) -> Parser:
+    # Příkaz odsazený víc než `depth`, tj. patřící do těla cyklu
+    return column.bind(lambda col: statement if col > depth else fail("indented statement"))
+
+@generate
+def repeat_def():
+    depth = yield column
+    repetitions, output, workers = yield regex(r"repeat\s*(\d+)\s*(?:output\s*=\s*([^\s:]+)\s*)?(?:workers\s*=\s*(\d+)\s*)?:\s*", group=(1, 2, 3))
+    if workers and not output:
+        # Procesy kreslí jen snímky animace, bez výstupního souboru by se nepoužily
+        raise ValueError("Repeat with workers needs an output file: repeat N output = <file> workers = N:")
+    body = yield indented(depth).many()
+    return {"command": "repeat", "repetitions": int(repetitions), "output": output, "workers": workers and int(workers), "body": body}
+
+statements = {
+    "point": point_def,
+    "line": line_def,
+    "polygon": polygon_def,
+    "circle": circle_def,
+    "list": list_def,
+    "translate": transform_def,
+    "scale": transform_def,
+    "rotate": transform_def,
+    "repeat": repeat_def,
+    "plot": plot_def,
+    "union": set_operation_def,
+    "intersection": set_operation_def,
+    "area": measure_def,
+    "perimeter": measure_def,
+    "query": query_def,
+    "load": load_def,
+    "save": save_def,
+}
+keyword = re.compile(r"[a-zA-Z_][a-zA-Z0-9_]*")
+
+@Parser
+def statement(stream: str, index: int) -> Result:
+    # Výběr parseru podle klíčového slova na začátku příkazu
+    match = keyword.match(stream, index)
+    if match is None:
+        return Result.failure(index, "command")
+    if match.group() not in statements:
+        raise ValueError(f"Unknown command: {stream[index:].split(chr(10), 1)[0]}")
+    return statements[match.group()](stream, index)
+
+@Parser
+def line_start(stream: str, index: int) -> Result:
+    # Příkaz nejvyšší úrovně začíná na neodsazeném řádku (první může být odsazený), stejně
+    # jako bloky z `tokenize_script_to_blocks`
+    if index == 0 or stream[index - 1] == "\n" or not stream[:index].strip():
+        return Result.success(index, None)
+    return Result.failure(index, "statement at the start of a line")
+
+program = spaces >> (line_start >> statement).many() << eof
+command_def = statement << eof
+
+blank_lines = re.compile(r"\n[^\S\n]*(?=\n)")
+block_starts = re.compile(r"\n(?=\S)")
 
 def tokenize_script_to_blocks(script: str) -> list[str]:
-    lines = [line for line in script.strip().split("\n") if line.strip()]
-    blocks = []
-    current_block = []
+    # Blok začíná každým neodsazeným řádkem, prázdné řádky se vynechají
+    script = blank_lines.sub("", script.strip())
+    return block_starts.split(script) if script else []
 
+def stream_blocks(lines: Iterable[str]) -> Iterator[str]:
+    """Yields the blocks of a script read line by line, each one as soon as the next unindented line starts it."""
+    block: list[str] = []
     for line in lines:
-        # Odsazení aktuálního řádku
-        indent_level = len(line) - len(line.lstrip())
-
-        if indent_level == 0:
-            # Pokud má řádek nulové odsazení, zahájíme nový blok
-            if current_block:
-                blocks.append("\n".join(current_block))  # Uložíme předchozí blok
-            current_block = [line]  # Zahájíme nový blok
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            continue
+        if not block:
+            # Stejně jako u celého skriptu se odsazení prvního řádku ignoruje
+            line = line.lstrip()
+        elif not line[0].isspace():
+            yield "\n".join(block)
+            block = []
+        block.append(line)
+    if block:
+        yield "\n".join(block)
+
+def parse_program(code: str) -> list[dict]:
+    return program.parse(code)
+
+def parse_commands(code: str, variables: dict = {}):
+    statements = parse_program(code)
+    # Jména se zkontrolují dřív, než se cokoli provede
+    resolve(statements, variables.keys())
+    symbols = SymbolTable(variables)
+    for parsed_statement in statements:
+        execute(parsed_statement, symbols)
+
+    return variables
+
+def run_lines(lines: Iterable[str], variables: dict) -> dict:
+    """Like `parse_commands`, but parses and executes every block as soon as it is read."""
+    symbols = SymbolTable(variables)
+    for block in stream_blocks(lines):
+        execute(command_def.parse(block), symbols)
+    return variables
+
+def run_file(path: str, variables: dict) -> dict:
+    # Soubor se čte po řádcích, v paměti je vždy jen jeden blok
+    with open(path, encoding="utf-8") as file:
+        return run_lines(file, variables)
+
+def symbol_table(variables: dict | SymbolTable) -> SymbolTable:
+    return variables if isinstance(variables, SymbolTable) else SymbolTable(variables)
+
+def execute(parsed_statement: dict, variables: dict | SymbolTable):
+    symbols = symbol_table(variables)
+    parsed = build_command(parsed_statement, symbols)
+    if parsed is not None:
+        if isinstance(parsed, dict) and "name" in parsed:
+            symbols.define(parsed["name"], parsed["obj"])
         else:
-            # Pokud má řádek odsazení, přidáme jej do aktuálního bloku
-            current_block.append(line)
+            # There was transformation or cycle so evaluate
+            parsed.compile()()
 
-    # Přidání posledního bloku
-    if current_block:
-        blocks.append("\n".join(current_block))
+def parse_command(command: str, variables: dict) -> Any:
+    return build_command(command_def.parse(command.strip()), variables)
 
-    return blocks
+def build_command(parsed: dict, variables: dict | SymbolTable) -> Any:
+    symbols = symbol_table(variables)
+    match parsed["command"]:
+        case "point":
+            return {"name": parsed["name"], "obj": PointNode(parsed["coord"], parsed["color"])}
+        case "line":
+            return {"name": parsed["name"], "obj": LineNode(points=parsed["points"], color=parsed["color"])}
+        case "polygon":
+            return {"name": parsed["name"], "obj": PolygonNode(points=parsed["points"], color=parsed["color"])}
+        case "circle":
+            return {"name": parsed["name"], "obj": CircleNode(center=parsed["center"], radius=parsed["radius"], color=parsed["color"])}
+        case "list":
+            return build_geometry_list(parsed, symbols)
+        case "transform":
+            return build_transform(parsed, symbols)
+        case "repeat":
+            body = build_body(parsed["body"], symbols.scope())
+            # `repeat 20 output = anim.gif workers = 4:` skládá vykreslení v těle do jedné animace
+            animation = None
+            if parsed.get("output"):
+                # Pillow a kodéry animací se načtou, až když je skript opravdu potřebuje
+                from src.animation import Animation
+                animation = Animation(parsed["output"], workers=parsed.get("workers"))
+            return RepeatCycleNode(parsed["repetitions"], body, animation)
+        case "plot":
+            return build_plot(parsed, symbols)
+        case "set_operation":
+            # Výsledek se spočítá až při provedení, z tehdejšího stavu operandů
+            return BindNode(parsed["name"], SetOperationNode(build_operands(parsed, symbols), parsed["operation"]), symbols)
+        case "query":
+            if parsed["box"].shape != (2, 2):
+                raise ValueError(f"Query box needs two corners: {parsed['box'].tolist()}")
+            box = tuple(parsed["box"].min(axis=0).tolist() + parsed["box"].max(axis=0).tolist())
+            return BindNode(parsed["name"], QueryNode(build_operands(parsed, symbols), box), symbols)
+        case "measure":
+            return BindNode(parsed["name"], MeasureNode(build_operands(parsed, symbols), parsed["measure"]), symbols)
+        case "load":
+            # Načtené geometrie jsou rovnou zabalený seznam nad souborem
+            return {"name": parsed["name"], "obj": GeometryListNode.from_store(read_store(parsed["path"]))}
+        case "save":
+            return SaveNode(symbols.lookup(parsed["name"]), parsed["path"])
+        case _:
+            raise ValueError(f"Unknown command: {parsed['command']}")
 
-def parse_commands(code: str, variables: dict = {}):
-    blocks = tokenize_script_to_blocks(code)
-    for block in blocks:
-        parsed = parse_command(block, variables)
-        if parsed is not None:
-            if isinstance(parsed, dict) and "name" in parsed:
-                variables[parsed["name"]] = parsed["obj"]
-            else:
-                # There was transformation or cycle so evaluate
-                parsed.evaluate()
-
-    return variables      
-
-def parse_command(command: str, variables: dict) -> None:
-    command = command.strip()
-    if command.startswith("point"):
-        parsed = parse_point(command)
-    elif command.startswith("line"):
-        parsed = parse_line(command)
-    elif command.startswith("polygon"):
-        parsed = parse_polygon(command)
-    elif command.startswith("circle"):
-        parsed = parse_circle(command)
-    elif command.startswith("list"):
-        parsed = parse_geometry_list(command, variables=variables)
-    elif command.startswith(("translate", "scale", "rotate")):
-        parsed = parse_transform(command, variables=variables)
-    elif command.startswith("repeat"):
-        parsed = parse_repeat_cycle(command, variables)
-    elif command.startswith("plot"):
-        parsed = parse_plot(command, variables)
-    else:
-        raise ValueError(f"Unknown command: {command}")
-    
-    return parsed
+class StatementNode(ASTNode):
+    # Příkaz těla cyklu, který se sestaví a provede znovu při každém průchodu
+    def __init__(self, parsed: dict, symbols: SymbolTable) -> None:
+        self.parsed = parsed
+        self.symbols = symbols
 
-def parse_point(command: str):
-    point_def = seq(
-        lexeme(string("point")) >> identifier << lexeme(string(":")),
-        ((lexeme(string("coord")) >> lexeme(string("="))) | spaces) >> points_list,
-        lexeme(string("color")) >> lexeme(string("=")) >> color_list
-    ).combine(lambda name, point, color: {"name": name, "obj": PointNode(point[0], color)})
-    
-    return point_def.parse(command)
+    def evaluate(self):
+        execute(self.parsed, self.symbols)
 
-def parse_line(command: str):
-    line_def = seq(
-        lexeme(string("line")) >> lexeme(identifier) << lexeme(string(":")),
-        lexeme(string('points')) >> lexeme(string('=')) >> points_list,
-        lexeme(string('color'))  >> lexeme(string('=')) >> color_list
-    ).combine(lambda name, points, color: {"name": name, "obj": LineNode(points=points, color=color)})
-
-    return line_def.parse(command)
-    
-def parse_polygon(command: str) -> Any:    
-    polygon_def = seq(
-        lexeme(string('polygon')) >> lexeme(identifier) << lexeme(string(':')),
-        lexeme(string('points')) >> lexeme(string('=')) >> points_list,
-        lexeme(string('color'))  >> lexeme(string('=')) >> color_list
-    ).combine(lambda name, points, color: {"name": name, "obj": PolygonNode(points=points, color=color)})
-    
-    return polygon_def.parse(command)
+class ClearScopeNode(ASTNode):
+    # Na začátku průchodu se zapomenou jména definovaná tělem v předchozím průchodu
+    def __init__(self, symbols: SymbolTable) -> None:
+        self.symbols = symbols
 
-def parse_circle(command: str):
-    circle_def = seq(
-        lexeme(string("circle")) >> lexeme(identifier) << lexeme(string(":")),
-        ((lexeme(string("center")) >> lexeme(string("="))) | spaces) >> points_list,
-        ((lexeme(string("radius")) >> lexeme(string("="))) | spaces) >> decimal,
-        lexeme(string('color'))  >> lexeme(string('=')) >> color_list
-    ).combine(lambda name, center, radius, color: {"name": name, "obj": CircleNode(center=center[0], radius=radius, color=color)})
-    
-    return circle_def.parse(command)
+    def evaluate(self):
+        self.symbols.variables.clear()
 
-def parse_geometry_list(command: str, variables: dict):
-    list_parser = seq(
-        string('list') >> spaces >> identifier << colon << spaces,
-        identifier_list
-    ).combine(lambda name, geom_list: {"name": name, "geoms": geom_list})
-    
-    parsed = list_parser.parse(command)
+def build_body(statements: list[dict], symbols: SymbolTable) -> list:
+    # Definice v těle cyklu a příkazy, které čtou jména z těla, se provedou při každém
+    # průchodu znovu s aktuálními hodnotami; ostatní příkazy se sestaví jen jednou
+    body, local = [], set()
+    for el in statements:
+        reads, _, _ = statement_names(el)
+        if is_definition(el) or reads & local:
+            body.append(StatementNode(el, symbols))
+        else:
+            body.append(build_command(el, symbols))
+        if is_definition(el):
+            local.add(el["name"])
+    if local:
+        body.insert(0, ClearScopeNode(symbols))
+    return body
+
+def build_geometry_list(parsed: dict, symbols: SymbolTable):
     geom_list = GeometryListNode()
-    
+
     for geom_name in parsed["geoms"]:
-        if geom_name in variables:
-            geom_list.add(variables[geom_name])
-        else:
-            raise ValueError(f"Unknown geometry variable: {geom_name}")
+        geom_list.add(symbols.lookup(geom_name))
+
+    # Seznam samotných geometrií se drží ve sloupcovém úložišti
+    if all(isinstance(node, GeometryNode) for node in geom_list.geometries):
+        geom_list.pack()
 
     return {"name": parsed["name"], "obj": geom_list}
 
-def parse_transform(command: str, variables: dict):
-    transform_parser = seq(
-        lexeme(identifier), # transform type
-        lexeme(identifier) << colon, # geometry object or list
-        lexeme(identifier) << lexeme(string("=")), # first argument name
-        lexeme(decimal), # float value
-        lexeme(identifier) << lexeme(string("=")), # second argument name
-        (lexeme(l_bracket) >> lexeme(point_parser) << lexeme(r_bracket) | lexeme(decimal) | lexeme(string("center"))) # point
-    ).combine(
-        lambda transform, geom_obj, arg1_name, arg1_value, arg2_name, arg2_value: 
-        {
-            "transform": transform, "obj": geom_obj, "kwargs": {
-                arg1_name: arg1_value, arg2_name: arg2_value if not isinstance(arg2_value, list) else tuple(arg2_value)
-                }
-        }
-    )
-
-    parsed = transform_parser.parse(command)
-
-    if isinstance(parsed["obj"], GeometryListNode):
-        for var in parsed["obj"].evaluate():
-            if var not in list(variables.values()):
-                raise ValueError(f"Object: {var} is not known variable")
-    elif isinstance(parsed["obj"], ASTNode):
-        if parsed["obj"] not in list(variables.values()):
-            raise ValueError(f"Object: {var} is not known variable")
-        
+def build_operands(parsed: dict, symbols: SymbolTable) -> list:
+    return [symbols.lookup(geom_name) for geom_name in parsed["geoms"]]
+
+def build_transform(parsed: dict, symbols: SymbolTable):
+    geometry_nodes = symbols.lookup(parsed["obj"])
+
     match parsed["transform"]:
         case "translate":
             if "x" not in parsed["kwargs"] or "y" not in parsed["kwargs"]:
@@ -175,34 +392,59 @@ def parse_transform(command: str, variables: dict):
         case "scale":
             if "factor" not in parsed["kwargs"] or "origin" not in parsed["kwargs"]:
                 raise ValueError(f"Scale has wrong arguments: {parsed['kwargs']}")
-            
+
     if len(parsed["kwargs"]) != 2:
         raise ValueError(f"Wrong input arguments count.")
 
-    return TransformNode(geometry_nodes=variables[parsed["obj"]], operation=parsed["transform"], kwargs=parsed["kwargs"])
+    return TransformNode(geometry_nodes=geometry_nodes, operation=parsed["transform"], kwargs=parsed["kwargs"])
+
+def build_plot(parsed: dict, symbols: SymbolTable):
+    return DrawNode(geometry_nodes=symbols.lookup(parsed["name"]))
+
+def parse_point(command: str):
+    return build_command(point_def.parse(command), {})
+
+def parse_line(command: str):
+    return build_command(line_def.parse(command), {})
+
+def parse_polygon(command: str) -> Any:
+    return build_command(polygon_def.parse(command), {})
+
+def parse_circle(command: str):
+    return build_command(circle_def.parse(command), {})
+
+def parse_geometry_list(command: str, variables: dict):
+    return build_command(list_def.parse(command), variables)
+
+def parse_transform(command: str, variables: dict):
+    return build_command(transform_def.parse(command), variables)
 
 def parse_repeat_cycle(command: str, variables: dict):
-    repeat_parser = seq(
-        lexeme(string("repeat")),
-        regex(r'\d+').map(int) << colon
-    ).combine(lambda _, repetitions: repetitions)
- 
-    lines = command.split("\n")
-    repetitions = repeat_parser.parse(lines[0])
-    
-    body_blocks = "\n".join([line[4:] for line in lines[1:]])
-    body = [parse_command(block, variables) for block in tokenize_script_to_blocks(body_blocks)]
-    return RepeatCycleNode(repetitions, body)
+    return build_command(repeat_def.parse(command), variables)
+
+def parse_set_operation(command: str, variables: dict):
+    return build_command(set_operation_def.parse(command), variables)
+
+def parse_measure(command: str, variables: dict):
+    return build_command(measure_def.parse(command), variables)
+
+def parse_query(command: str, variables: dict):
+    return build_command(query_def.parse(command), variables)
 
 def parse_plot(command: str, variables: dict):
-    plot_parser = seq(
-        lexeme(string("plot")),
-        lexeme(identifier)
-    ).combine(lambda _, name: name)
+    return build_command(plot_def.parse(command), variables)
+
+def parse_load(command: str, variables: dict):
+    return build_command(load_def.parse(command), variables)
 
-    name = plot_parser.parse(command)
+def parse_save(command: str, variables: dict):
+    return build_command(save_def.parse(command), variables)
 
-    if name not in variables:
-        raise ValueError(f"Variable {name} not known")
+def load_file(path: str, variables: dict, name: str):
+    """Loads geometries from a `.npz`, `.npy` or `.wkb` file to `variables[name]` as a packed list."""
+    execute({"command": "load", "name": name, "path": path}, variables)
+    return variables[name]
 
-    return DrawNode(geometry_nodes=variables[name])
\ No newline at end of file
+def save_file(variables: dict, name: str, path: str):
+    """Saves the geometries of `variables[name]` to a `.npz`, `.npy` or `.wkb` file."""
+    execute({"command": "save", "name": name, "path": path}, variables)
@@ -0,0 +1,218 @@
+"""
+Opt-in instrumentation of a PolyDraw run.
+
+While a `Profiler` is active it wraps parsing, the execution of every statement, the
+evaluation of every AST node and rendering, and records wall time, call counts,
+processed vertices and optionally peak allocations measured by tracemalloc. Results are
+grouped by phase, command type, source line of top-level statements, node class and
+renderer. Nothing is wrapped while no profiler is active.
+
+Times are inclusive, a `repeat` contains the time of its body and rendering contains
+the time of the `plot` that called it.
+"""
+
+import json
+import time
+import tracemalloc
+from typing import Any, Callable
+
+import shapely
+
+from src import parser
+from src.my_ast import ASTNode, GeometryNode, GeometryListNode, member_nodes
+
+class Stats:
+    __slots__ = ("calls", "seconds", "vertices", "peak")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.vertices = 0
+        self.peak = 0 # největší přírůstek alokací během jednoho volání v bajtech
+
+    def as_dict(self) -> dict:
+        return {"calls": self.calls, "seconds": self.seconds, "vertices": self.vertices, "peak_bytes": self.peak}
+
+def all_subclasses(cls: type) -> list[type]:
+    classes = []
+    for subclass in cls.__subclasses__():
+        classes.append(subclass)
+        classes.extend(all_subclasses(subclass))
+    return classes
+
+def node_vertices(node: ASTNode) -> int:
+    # Počet vrcholů geometrií, se kterými uzel pracuje
+    if isinstance(node, GeometryListNode) and node.is_packed():
+        return len(node.store.coords)
+    members = getattr(node, "geometries", None) or getattr(node, "operands", None)
+    if isinstance(node, GeometryNode):
+        members = [node]
+    if not members:
+        return 0
+    count = 0
+    for member in member_nodes(members):
+        if not isinstance(member, GeometryNode):
+            continue
+        if member.store is not None:
+            count += int(member.store.offsets[member.index + 1] - member.store.offsets[member.index])
+        else:
+            count += int(shapely.get_num_coordinates(member.stored()))
+    return count
+
+def statement_lines(code: str) -> list[int]:
+    # Čísla řádků, na kterých začínají příkazy nejvyšší úrovně, tj. neodsazených neprázdných řádků
+    return [number for number, line in enumerate(code.split("\n"), 1) if line[:1].strip()]
+
+class Profiler:
+    """Context manager that instruments PolyDraw while it is active."""
+
+    def __init__(self, memory: bool = False):
+        self.memory = memory
+        self.groups: dict[str, dict[Any, Stats]] = {"parse": {}, "commands": {}, "lines": {}, "nodes": {}, "render": {}}
+        # id příkazu -> (příkaz, číslo řádku, kde začíná), příkaz drží id platné
+        self.lines: dict[int, tuple[dict, int]] = {}
+        # Počty vrcholů uzlů, spočítají se jednou na uzel
+        self.vertices: dict[int, int] = {}
+        # Uzly, jejichž volání se právě měří, aby se vnořené volání téhož uzlu nepočítalo dvakrát
+        self.running: set[int] = set()
+        # Pro každé rozpracované měření alokace na začátku a nejvyšší dosažené
+        self.allocations: list[list[int]] = []
+        self.patches: list[tuple[Any, str, Any]] = []
+        self.started_tracemalloc = False
+
+    def stats(self, group: str, key) -> Stats:
+        entries = self.groups[group]
+        if key not in entries:
+            entries[key] = Stats()
+        return entries[key]
+
+    def measure(self, keys: list[tuple[str, Any]], function: Callable, args: tuple, vertices: int = 0):
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self.allocations:
+                self.allocations[-1][1] = max(self.allocations[-1][1], peak)
+            tracemalloc.reset_peak()
+            self.allocations.append([current, current])
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            peak = 0
+            if self.memory:
+                start_memory, highest = self.allocations.pop()
+                highest = max(highest, tracemalloc.get_traced_memory()[1])
+                peak = highest - start_memory
+                if self.allocations:
+                    self.allocations[-1][1] = max(self.allocations[-1][1], highest)
+            for group, key in keys:
+                stats = self.stats(group, key)
+                stats.calls += 1
+                stats.seconds += elapsed
+                stats.vertices += vertices
+                stats.peak = max(stats.peak, peak)
+
+    def node_call(self, node: ASTNode, function: Callable, args: tuple = ()):
+        if id(node) in self.running:
+            return function(*args)
+        if id(node) not in self.vertices:
+            self.vertices[id(node)] = node_vertices(node)
+        self.running.add(id(node))
+        try:
+            return self.measure([("nodes", type(node).__name__)], function, args, self.vertices[id(node)])
+        finally:
+            self.running.discard(id(node))
+
+    def patch(self, owner: Any, name: str, replacement: Any):
+        self.patches.append((owner, name, owner.__dict__[name]))
+        setattr(owner, name, replacement)
+
+    def instrument_nodes(self):
+        profiler = self
+        for cls in [ASTNode] + all_subclasses(ASTNode):
+            if "evaluate" in cls.__dict__:
+                def evaluate(node, original=cls.__dict__["evaluate"]):
+                    return profiler.node_call(node, original, (node,))
+                self.patch(cls, "evaluate", evaluate)
+            if "compile" in cls.__dict__:
+                def compile(node, original=cls.__dict__["compile"]):
+                    step = original(node)
+                    return lambda: profiler.node_call(node, step)
+                self.patch(cls, "compile", compile)
+
+    def instrument_parser(self):
+        profiler = self
+        parse_program, parse_command, execute = parser.parse_program, parser.parse_command, parser.execute
+
+        def profiled_parse_program(code: str) -> list[dict]:
+            statements = profiler.measure([("parse", "program")], parse_program, (code,), 0)
+            starts = statement_lines(code)
+            # Řádky jde přiřadit, jen když každý příkaz začíná na vlastním neodsazeném řádku
+            if len(starts) == len(statements):
+                profiler.lines.update((id(statement), (statement, line)) for statement, line in zip(statements, starts))
+            return statements
+
+        def profiled_parse_command(command: str, variables: dict):
+            return profiler.measure([("parse", "command")], parse_command, (command, variables), 0)
+
+        def profiled_execute(parsed_statement: dict, variables):
+            keys = [("commands", parsed_statement["command"])]
+            statement, line = profiler.lines.get(id(parsed_statement), (None, None))
+            if statement is parsed_statement:
+                keys.append(("lines", line))
+            return profiler.measure(keys, execute, (parsed_statement, variables), 0)
+
+        self.patch(parser, "parse_program", profiled_parse_program)
+        self.patch(parser, "parse_command", profiled_parse_command)
+        self.patch(parser, "execute", profiled_execute)
+
+    def instrument_renderers(self):
+        from src.animation import Animation
+        from src.raster import RasterRenderer
+        from src.render import Renderer
+
+        profiler = self
+        for cls in (Renderer, RasterRenderer, Animation):
+            def render(renderer, store, path=None, original=cls.__dict__["render"]):
+                return profiler.measure([("render", type(renderer).__name__)], original, (renderer, store, path), len(store.coords))
+            self.patch(cls, "render", render)
+
+    def __enter__(self) -> "Profiler":
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+        self.instrument_nodes()
+        self.instrument_parser()
+        self.instrument_renderers()
+        return self
+
+    def __exit__(self, *exc):
+        for owner, name, original in reversed(self.patches):
+            setattr(owner, name, original)
+        self.patches.clear()
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+
+    def report(self) -> dict:
+        """Collected statistics as a JSON serializable dict, lines are keyed by their number."""
+        return {group: {str(key): stats.as_dict() for key, stats in entries.items()} for group, entries in self.groups.items()}
+
+    def to_json(self, path: str):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.report(), file, indent=2)
+
+    def text(self, limit: int = 10) -> str:
+        # Čitelný přehled, v každé skupině nejpomalejší položky
+        titles = {"parse": "Parsing", "commands": "Commands", "lines": "Source lines", "nodes": "AST nodes", "render": "Rendering"}
+        out = []
+        for group, entries in self.groups.items():
+            if not entries:
+                continue
+            out.append(f"{titles[group]}:")
+            out.append(f"  {'name':<20} {'calls':>8} {'seconds':>10} {'vertices':>12}" + (f" {'peak KiB':>10}" if self.memory else ""))
+            for key, stats in sorted(entries.items(), key=lambda item: -item[1].seconds)[:limit]:
+                name = f"line {key}" if group == "lines" else str(key)
+                row = f"  {name:<20} {stats.calls:>8} {stats.seconds:>10.4f} {stats.vertices:>12}"
+                out.append(row + (f" {stats.peak / 1024:>10.1f}" if self.memory else ""))
+        return "\n".join(out)
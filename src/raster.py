@@ -0,0 +1,88 @@
+"""
+Renders geometries straight to raster images with NumPy and Pillow, without matplotlib.
+
+World coordinates are mapped to pixels in one vectorized step, keeping the aspect ratio
+like `axis("equal")`. Colors and alpha match the matplotlib renderer; there are no axes.
+"""
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from src.store import GeometryStore, POINT, LINE, POLYGON, CIRCLE
+
+class RasterRenderer:
+    def __init__(self, path: str = "./test.png", format: str | None = None, size: tuple[int, int] = (640, 480), margin: float = 0.05, background=(255, 255, 255)):
+        self.path = path
+        self.format = format # podle přípony `path`, pokud není zadán
+        self.size = size
+        self.margin = margin
+        self.background = background
+        self.line_width = 2
+        self.point_radius = 4
+        # Pevný výřez (min, max) souřadnic, jinak se výřez přizpůsobí každému obrázku
+        self.extent: tuple[np.ndarray, np.ndarray] | None = None
+
+    def scale(self, low: np.ndarray, high: np.ndarray) -> float:
+        # Pixelů na jednotku souřadnic
+        width, height = self.size
+        span = np.where(high - low > 0, high - low, 1.0)
+        return min(width * (1 - 2 * self.margin) / span[0], height * (1 - 2 * self.margin) / span[1])
+
+    def to_pixels(self, coords: np.ndarray, extent: tuple[np.ndarray, np.ndarray] | None = None) -> np.ndarray:
+        width, height = self.size
+        if not len(coords):
+            return coords
+        if extent is None:
+            extent = self.extent if self.extent is not None else (coords.min(axis=0), coords.max(axis=0))
+        low, high = extent
+        center = (low + high) / 2
+        pixels = (coords - center) * self.scale(low, high)
+        # Osa y v obrázku roste dolů
+        return np.column_stack([width / 2 + pixels[:, 0], height / 2 - pixels[:, 1]])
+
+    def draw(self, store: GeometryStore) -> Image.Image:
+        # Kreslení v režimu RGBA do RGB obrázku míchá barvy podle alfy
+        image = Image.new("RGB", self.size, self.background)
+        draw = ImageDraw.Draw(image, "RGBA")
+        # Kružnice se rozloží na tolik úseků, kolik odpovídá jejich velikosti v pixelech
+        extent = self.extent if self.extent is not None else store.extent()
+        store = store.tessellated(1 / self.scale(*extent))
+        flat = self.to_pixels(store.coords, extent).ravel().tolist()
+        offsets = (store.offsets * 2).tolist()
+        colors = [tuple(color) for color in store.colors.tolist()]
+        # Kruhy řádků s více kruhy, tj. polygonů s dírami
+        holed: dict[int, list] = {}
+        if store.has_holes():
+            rings = (store.rings * 2).tolist()
+            ring_rows = store.ring_rows()
+            rows = set(np.flatnonzero(np.bincount(ring_rows, minlength=len(store)) > 1).tolist())
+            for row, start, end in zip(ring_rows.tolist(), rings, rings[1:]):
+                if row in rows:
+                    holed.setdefault(row, []).append(flat[start:end])
+
+        for index, kind in enumerate(store.kinds.tolist()):
+            xy = flat[offsets[index]:offsets[index + 1]]
+            if index in holed:
+                self.draw_holed(image, draw, holed[index], colors[index])
+            elif kind == POLYGON:
+                draw.polygon(xy, fill=colors[index] + (128,), outline=(0, 0, 0, 128)) # Vyplnění polygonu
+            elif kind in (LINE, CIRCLE):
+                draw.line(xy, fill=colors[index] + (255,), width=self.line_width, joint="curve")
+            elif kind == POINT:
+                x, y, r = xy[0], xy[1], self.point_radius
+                draw.ellipse((x - r, y - r, x + r, y + r), fill=colors[index] + (255,))
+        return image
+
+    def draw_holed(self, image: Image.Image, draw: ImageDraw.ImageDraw, rings: list[list[float]], color: tuple):
+        # Průhlednost výplně jako maska, díry se z ní vyříznou
+        mask = Image.new("L", image.size, 0)
+        mask_draw = ImageDraw.Draw(mask)
+        mask_draw.polygon(rings[0], fill=128)
+        for hole in rings[1:]:
+            mask_draw.polygon(hole, fill=0)
+        image.paste(color, mask=mask)
+        for ring in rings:
+            draw.line(ring, fill=(0, 0, 0, 128))
+
+    def render(self, store: GeometryStore, path: str | None = None):
+        self.draw(store).save(path or self.path, format=self.format)
@@ -0,0 +1,99 @@
+"""
+Renders geometries to image files with matplotlib.
+
+All geometries of one kind are drawn as a single collection. A headless renderer draws
+on an Agg canvas without pyplot and reuses one figure for every plot. matplotlib is
+imported only when the first plot is drawn, so scripts without plots never load it.
+"""
+
+import numpy as np
+
+from src.store import GeometryStore, POINT, LINE, POLYGON, CIRCLE
+
+class Renderer:
+    def __init__(self, path: str = "./test.jpg", format: str | None = None, headless: bool = False, size: tuple[float, float] = (6.4, 4.8), dpi: int = 100):
+        self.path = path
+        self.format = format # podle přípony `path`, pokud není zadán
+        self.headless = headless
+        self.size = size
+        self.dpi = dpi
+        self.figure = None
+        self.axes = None
+        # Pevný výřez (min, max) souřadnic, geometrie mimo něj se nevykreslí
+        self.extent: tuple[np.ndarray, np.ndarray] | None = None
+
+    def new_axes(self):
+        if not self.headless:
+            import matplotlib.pyplot as plt
+            return plt.subplots(figsize=self.size, dpi=self.dpi)
+
+        if self.figure is None:
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from matplotlib.figure import Figure
+
+            self.figure = Figure(figsize=self.size, dpi=self.dpi)
+            FigureCanvasAgg(self.figure)
+            self.axes = self.figure.add_subplot()
+        else:
+            self.axes.clear()
+        return self.figure, self.axes
+
+    def render(self, store: GeometryStore, path: str | None = None):
+        fig, ax = self.new_axes()
+        # Kružnice se rozloží podle velikosti pixelu při celém výřezu na obrázku
+        low, high = self.extent if self.extent is not None else store.extent()
+        pixels = np.array(self.size) * self.dpi
+        draw_store(ax, store.tessellated(max(((high - low) / pixels).max(), 1e-12)))
+        if self.extent is not None:
+            (minx, miny), (maxx, maxy) = self.extent
+            ax.set_xlim(minx, maxx)
+            ax.set_ylim(miny, maxy)
+        fig.savefig(path or self.path, format=self.format)
+        if not self.headless:
+            import matplotlib.pyplot as plt
+            plt.show()
+
+def draw_store(ax, store: GeometryStore):
+    from matplotlib.collections import LineCollection, PolyCollection
+    from matplotlib.path import Path
+
+    segments = np.split(store.coords, store.offsets[1:-1])
+    colors = store.colors / 255
+
+    def select(kind: int) -> tuple[list[np.ndarray], np.ndarray]:
+        rows = np.flatnonzero(store.kinds == kind)
+        return [segments[row] for row in rows], colors[rows]
+
+    polygons, polygon_colors = select(POLYGON)
+    if polygons:
+        collection = PolyCollection(polygons, facecolors=polygon_colors, edgecolors="k", alpha=0.5) # Vyplnění polygonů
+        if store.has_holes():
+            # Každý kruh polygonu začíná novou cestou, díry se tak nevyplní
+            starts = np.zeros(len(store.coords), dtype=bool)
+            starts[store.rings[:-1]] = True
+            codes = np.split(np.where(starts, Path.MOVETO, Path.LINETO).astype(Path.code_type), store.offsets[1:-1])
+            collection.set_verts_and_codes(polygons, [codes[row] for row in np.flatnonzero(store.kinds == POLYGON)])
+        ax.add_collection(collection)
+    lines, line_colors = select(LINE)
+    if lines:
+        ax.add_collection(LineCollection(lines, colors=line_colors, linestyles="-"))
+    circles, circle_colors = select(CIRCLE)
+    if circles:
+        ax.add_collection(LineCollection(circles, colors=circle_colors))
+    points = store.kinds == POINT
+    if points.any():
+        xy = store.coords[store.offsets[:-1][points]]
+        ax.scatter(xy[:, 0], xy[:, 1], c=colors[points], marker="o")
+
+    ax.autoscale_view()
+    ax.axis("equal")
+
+default_renderer = Renderer()
+
+def get_renderer() -> Renderer:
+    return default_renderer
+
+def set_renderer(renderer: Renderer):
+    # Renderer použitý příkazy `plot`, které nemají vlastní
+    global default_renderer
+    default_renderer = renderer
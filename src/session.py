@@ -0,0 +1,127 @@
+"""
+Incremental execution of a script that is edited repeatedly, e.g. by an editor preview.
+
+The script is split to blocks by `tokenize_script_to_blocks`. Parsed blocks are cached by
+their text, so only new or edited blocks are parsed again. After an edit only the blocks
+that depend on it through the variables they read and change are executed again, on top
+of the variables left by the previous run.
+
+Variables that share geometry nodes (a list and its members, a query and the list it
+selects from) form one group and are always rebuilt together. A block executed again
+must see the same state as in a full run, so a variable it reads that some later block
+changes is rebuilt as well.
+"""
+
+from src.parser import command_def, execute, tokenize_script_to_blocks
+from src.symbols import statement_names
+
+class Session:
+    def __init__(self):
+        self.variables: dict = {}
+        self.blocks: list[str] = []
+        # Text bloku -> (příkaz, čtené proměnné, měněné proměnné, sdílení uzlů)
+        self.parsed: dict[str, tuple] = {}
+        # Skupina každé proměnné sdílející uzly a skupiny čtené a měněné bloky
+        self.group: dict[str, str] | None = None
+        self.group_names: dict[str, tuple[set[str], set[str]]] = {}
+        self.executed = 0
+
+    def parse(self, block: str) -> tuple:
+        if block not in self.parsed:
+            statement = command_def.parse(block)
+            self.parsed[block] = (statement, *statement_names(statement))
+        return self.parsed[block]
+
+    def names(self, block: str) -> tuple[set[str], set[str]]:
+        if block not in self.group_names:
+            _, reads, writes, _ = self.parsed[block]
+            self.group_names[block] = ({self.group.get(name, name) for name in reads}, {self.group.get(name, name) for name in writes})
+        return self.group_names[block]
+
+    def update(self, code: str) -> dict:
+        """Runs the edited script and returns its variables, executing only the blocks affected by the edit."""
+        blocks = tokenize_script_to_blocks(code)
+        old_blocks = self.blocks
+        entries = [self.parse(block) for block in blocks]
+
+        # Změněný úsek mezi společným začátkem a koncem starého a nového skriptu
+        start = 0
+        while start < min(len(blocks), len(old_blocks)) and blocks[start] == old_blocks[start]:
+            start += 1
+        end = 0
+        while end < min(len(blocks), len(old_blocks)) - start and blocks[-1 - end] == old_blocks[-1 - end]:
+            end += 1
+        changed = list(range(start, len(blocks) - end))
+        removed = old_blocks[start:len(old_blocks) - end]
+
+        # Skupiny se přepočítají, jen když se změnilo sdílení uzlů
+        if self.group is None or any(self.parsed[block][3] for block in removed + blocks[start:len(blocks) - end]):
+            self.group = self.groups(entries + [self.parsed[block] for block in removed])
+            self.group_names = {}
+        names = [self.names(block) for block in blocks]
+
+        touching: dict[str, list[int]] = {}
+        last_write: dict[str, int] = {}
+        for position, (reads, writes) in enumerate(names):
+            for name in reads | writes:
+                touching.setdefault(name, []).append(position)
+            for name in writes:
+                last_write[name] = position
+
+        # Šíření změny: blok, který čte nebo mění zasaženou skupinu, se provede znovu
+        # a zasáhne skupiny, které mění. Čtená skupina, kterou později mění jiný blok,
+        # už nemá stav z doby tohoto bloku, takže se musí postavit znovu také.
+        affected: set[str] = set()
+        rerun: set[int] = set()
+        groups = [name for block in removed for name in self.names(block)[1]]
+        positions = list(changed)
+        while groups or positions:
+            for name in groups:
+                if name not in affected:
+                    affected.add(name)
+                    positions.extend(touching.get(name, []))
+            groups = []
+            for position in positions:
+                if position not in rerun:
+                    rerun.add(position)
+                    reads, writes = names[position]
+                    groups.extend(writes)
+                    groups.extend(name for name in reads if last_write.get(name, -1) > position)
+            positions = []
+
+        try:
+            for name in [name for name in self.variables if self.group.get(name, name) in affected]:
+                del self.variables[name]
+            for position in sorted(rerun):
+                execute(entries[position][0], self.variables)
+                self.executed += 1
+        except Exception:
+            # Proměnné jsou v nedefinovaném stavu, příště se provede celý skript
+            self.blocks = []
+            self.variables = {}
+            raise
+
+        self.blocks = blocks
+        if len(self.parsed) > 2 * len(blocks):
+            # Bloky, které ze skriptu zmizely, se zapomenou
+            current = set(blocks)
+            self.parsed = {block: entry for block, entry in self.parsed.items() if block in current}
+            self.group_names = {block: entry for block, entry in self.group_names.items() if block in current}
+        return self.variables
+
+    def groups(self, entries: list[tuple]) -> dict[str, str]:
+        # Proměnné sdílející uzly se sloučí do skupin (union-find), vrací skupinu sdílejících proměnných
+        parent: dict[str, str] = {}
+
+        def find(name: str) -> str:
+            while parent.get(name, name) != name:
+                parent[name] = parent.get(parent[name], parent[name])
+                name = parent[name]
+            return name
+
+        for _, _, _, aliases in entries:
+            for first, second in aliases:
+                root_first, root_second = find(first), find(second)
+                if root_first != root_second:
+                    parent[root_first] = root_second
+        return {name: find(name) for name in parent}
@@ -0,0 +1,281 @@
+"""
+Columnar storage of many geometries: one contiguous coordinate buffer, offsets into it,
+a geometry kind per row and an RGB color per row.
+
+Polygons are stored as their closed rings, the exterior first and then the holes.
+`rings` holds the offsets of all rings; a point or a line is a single ring of its row.
+
+A circle is stored analytically as three control points: the center c, c + u and c + v.
+Its boundary is c + u cos t + v sin t, so any affine transform of the control points
+gives the exact transformed circle (an ellipse in general). Circles are tessellated only
+when a polygon is needed, at a number of segments chosen from the output resolution.
+"""
+
+import numpy as np
+import shapely
+
+from src.affine import transform_in_place
+
+# Druhy geometrií v úložišti
+POINT, LINE, POLYGON, CIRCLE = range(4)
+
+# Počet úseků kružnice bez známého rozlišení, stejně jako Point.buffer
+CIRCLE_SEGMENTS = 64
+
+def circle_control(center, radius: float) -> np.ndarray:
+    cx, cy = center
+    return np.array([[cx, cy], [cx + radius, cy], [cx, cy + radius]], dtype=np.float64)
+
+def circle_segments(control: np.ndarray, resolution: float | None) -> np.ndarray:
+    # Nejmenší počet úseků, při kterém se obvod od přesné křivky odchýlí nejvýš o půl pixelu
+    if resolution is None:
+        return np.full(len(control), CIRCLE_SEGMENTS)
+    u, v = control[:, 1] - control[:, 0], control[:, 2] - control[:, 0]
+    radius = np.sqrt((u ** 2).sum(axis=1) + (v ** 2).sum(axis=1))
+    ratio = np.clip(1 - resolution / 2 / np.maximum(radius, 1e-300), -1, 1)
+    return np.clip(np.ceil(np.pi / np.maximum(np.arccos(ratio), 1e-9)), 8, 1024).astype(np.int64)
+
+def tessellate(control: np.ndarray, segments: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Closed rings of circles given by control points (N, 3, 2); returns coordinates and offsets."""
+    segments = np.broadcast_to(np.asarray(segments, dtype=np.int64), len(control))
+    offsets = np.zeros(len(control) + 1, dtype=np.int64)
+    np.cumsum(segments + 1, out=offsets[1:])
+    rows = np.repeat(np.arange(len(control)), segments + 1)
+    # Body po směru hodinových ručiček od c + u, stejně jako Point.buffer
+    angles = -2 * np.pi * (np.arange(offsets[-1]) - offsets[:-1][rows]) / segments[rows]
+    cos, sin = np.cos(angles), np.sin(angles)
+    # Čtvrtiny obvodu přesně, stejně jako v rotation_matrix
+    cos[np.abs(cos) < 2.5e-16] = 0.0
+    sin[np.abs(sin) < 2.5e-16] = 0.0
+    center, u, v = control[:, 0], control[:, 1] - control[:, 0], control[:, 2] - control[:, 0]
+    coords = center[rows] + u[rows] * cos[:, None] + v[rows] * sin[:, None]
+    coords[offsets[1:] - 1] = coords[offsets[:-1]]
+    return coords, offsets
+
+def circle_polygon(control: np.ndarray) -> shapely.Polygon:
+    return shapely.Polygon(tessellate(np.asarray(control).reshape(1, 3, 2), CIRCLE_SEGMENTS)[0])
+
+class GeometryStore:
+    __slots__ = ("coords", "offsets", "kinds", "colors", "rings", "attached", "generation", "versions")
+
+    def __init__(self, coords: np.ndarray, offsets: np.ndarray, kinds: np.ndarray, colors: np.ndarray, rings: np.ndarray = None):
+        self.coords = np.ascontiguousarray(coords, dtype=np.float64).reshape(-1, 2)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.kinds = np.asarray(kinds, dtype=np.uint8)
+        self.colors = np.asarray(colors, dtype=np.uint8).reshape(-1, 3)
+        # Bez děr je každý řádek jediným kruhem
+        self.rings = self.offsets if rings is None else np.asarray(rings, dtype=np.int64)
+        # Počet uzlů, které jsou pohledem do úložiště
+        self.attached = 0
+        # Zvyšuje se při každé změně souřadnic, `versions` při změně daného řádku
+        self.generation = 0
+        self.versions = np.zeros(len(self.kinds), dtype=np.int64)
+
+    @classmethod
+    def from_geometries(cls, geometries: np.ndarray, kinds, colors) -> "GeometryStore":
+        """Packs shapely geometries; polygons are stored as their closed rings, circles as their control points."""
+        geometries = np.asarray(geometries, dtype=object)
+        kinds = np.asarray(kinds, dtype=np.uint8)
+        polygonal = kinds == POLYGON
+
+        # Části řádků: celý bod nebo čára, u polygonu každý jeho kruh
+        rows = np.flatnonzero(polygonal)
+        rings, ring_rows = shapely.get_rings(geometries[rows], return_index=True)
+        part_rows = np.concatenate([np.flatnonzero(~polygonal), rows[ring_rows]])
+        order = np.argsort(part_rows, kind="stable")
+        parts = np.concatenate([geometries[~polygonal], rings])[order]
+
+        coords, index = shapely.get_coordinates(parts, return_index=True)
+        part_sizes = np.bincount(index, minlength=len(parts))
+        ring_offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+        np.cumsum(part_sizes, out=ring_offsets[1:])
+        offsets = np.zeros(len(geometries) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(part_rows[order], weights=part_sizes, minlength=len(geometries)).astype(np.int64), out=offsets[1:])
+        has_holes = len(parts) != len(geometries)
+        return cls(coords, offsets, kinds, colors, ring_offsets if has_holes else None)
+
+    def has_holes(self) -> bool:
+        return len(self.rings) != len(self.offsets)
+
+    def ring_rows(self) -> np.ndarray:
+        # Řádek každého kruhu
+        return np.searchsorted(self.offsets, self.rings[:-1], side="right") - 1
+
+    def row_rings(self, index: int) -> np.ndarray:
+        # Začátky a konce kruhů řádku v poli souřadnic
+        first, last = np.searchsorted(self.rings, self.offsets[index:index + 2])
+        return self.rings[first:last + 1]
+
+    def snapshot(self) -> "GeometryStore":
+        # Kopie polí bez připojených uzlů, lze ji poslat do jiného procesu
+        rings = self.rings.copy() if self.has_holes() else None
+        return GeometryStore(self.coords.copy(), self.offsets.copy(), self.kinds.copy(), self.colors.copy(), rings)
+
+    def __getstate__(self):
+        return self.coords, self.offsets, self.kinds, self.colors, self.rings
+
+    def __setstate__(self, state):
+        self.coords, self.offsets, self.kinds, self.colors, self.rings = state
+        self.attached = self.generation = 0
+        self.versions = np.zeros(len(self.kinds), dtype=np.int64)
+
+    def take(self, rows: np.ndarray) -> "GeometryStore":
+        """New store with the given rows only, `rows` must be in increasing order."""
+        rows = np.asarray(rows, dtype=np.int64)
+        sizes = np.diff(self.offsets)[rows]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        # Index každé vybrané souřadnice v původním poli
+        coords = self.coords[np.repeat(self.offsets[rows] - offsets[:-1], sizes) + np.arange(offsets[-1])]
+
+        rings = None
+        if self.has_holes():
+            ring_sizes = np.diff(self.rings)[np.isin(self.ring_rows(), rows)]
+            rings = np.zeros(len(ring_sizes) + 1, dtype=np.int64)
+            np.cumsum(ring_sizes, out=rings[1:])
+        return GeometryStore(coords, offsets, self.kinds[rows], self.colors[rows], rings)
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def coordinates(self, index: int) -> np.ndarray:
+        return self.coords[self.offsets[index]:self.offsets[index + 1]]
+
+    def circles(self) -> np.ndarray:
+        # Řídicí body všech kružnic (N, 3, 2)
+        rows = np.flatnonzero(self.kinds == CIRCLE)
+        return self.coords[self.offsets[rows][:, None] + np.arange(3)]
+
+    def geometry(self, index: int):
+        coords = self.coordinates(index)
+        kind = self.kinds[index]
+        if kind == POINT:
+            return shapely.Point(coords[0])
+        if kind == LINE:
+            return shapely.LineString(coords)
+        if kind == CIRCLE:
+            return circle_polygon(coords)
+        rings = self.row_rings(index)
+        return shapely.Polygon(self.coords[rings[0]:rings[1]], [self.coords[start:end] for start, end in zip(rings[1:-1], rings[2:])])
+
+    def geometries(self) -> np.ndarray:
+        # Všechny geometrie najednou, po druzích vektorizovanými konstruktory shapely
+        result = np.empty(len(self), dtype=object)
+        rows = np.repeat(np.arange(len(self)), np.diff(self.offsets))
+
+        points = self.kinds == POINT
+        result[points] = shapely.points(self.coords[self.offsets[:-1][points]])
+
+        lines = (self.kinds == LINE)[rows]
+        if lines.any():
+            shapely.linestrings(self.coords[lines], indices=rows[lines], out=result)
+
+        circles = self.kinds == CIRCLE
+        if circles.any():
+            coords, offsets = tessellate(self.circles(), CIRCLE_SEGMENTS)
+            result[circles] = shapely.polygons(shapely.linearrings(coords, indices=np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))))
+
+        polygonal = self.kinds == POLYGON
+        if polygonal.any():
+            ring_rows = self.ring_rows()
+            ring_index = np.repeat(np.arange(len(ring_rows)), np.diff(self.rings))
+            polygonal_rings = polygonal[ring_rows]
+            rings = np.empty(len(ring_rows), dtype=object)
+            shapely.linearrings(self.coords[polygonal_rings[ring_index]], indices=ring_index[polygonal_rings[ring_index]], out=rings)
+            shapely.polygons(rings[polygonal_rings], indices=ring_rows[polygonal_rings], out=result)
+
+        return result
+
+    def bounds(self) -> np.ndarray:
+        # Obálky (minx, miny, maxx, maxy) všech řádků bez stavění geometrií
+        bounds = np.full((len(self), 4), np.nan)
+        filled = np.diff(self.offsets) > 0
+        starts = self.offsets[:-1][filled]
+        if len(starts):
+            bounds[filled, 0:2] = np.minimum.reduceat(self.coords, starts, axis=0)
+            bounds[filled, 2:4] = np.maximum.reduceat(self.coords, starts, axis=0)
+
+        circles = self.kinds == CIRCLE
+        if circles.any():
+            # Obálka elipsy c + u cos t + v sin t
+            control = self.circles()
+            u, v = control[:, 1] - control[:, 0], control[:, 2] - control[:, 0]
+            half = np.sqrt(u ** 2 + v ** 2)
+            bounds[circles, 0:2] = control[:, 0] - half
+            bounds[circles, 2:4] = control[:, 0] + half
+        return bounds
+
+    def extent(self) -> tuple[np.ndarray, np.ndarray]:
+        # Obálka celého úložiště jako (min, max)
+        bounds = self.bounds()
+        if not len(bounds) or np.isnan(bounds).all():
+            return np.zeros(2), np.zeros(2)
+        return np.nanmin(bounds[:, 0:2], axis=0), np.nanmax(bounds[:, 2:4], axis=0)
+
+    def tessellated(self, resolution: float | None = None) -> "GeometryStore":
+        """
+        Store with circles replaced by closed lines, `resolution` is the size of one pixel
+        in the units of the coordinates. Without circles the store itself is returned.
+        """
+        circles = self.kinds == CIRCLE
+        if not circles.any():
+            return self
+        control = self.circles()
+        rings, ring_offsets = tessellate(control, circle_segments(control, resolution))
+
+        # Kružnice se nahradí jejich body, ostatní řádky zůstanou
+        sizes = np.diff(self.offsets)
+        sizes[circles] = np.diff(ring_offsets)
+        offsets = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        coords = np.empty((offsets[-1], 2))
+        kept = np.repeat(~circles, sizes)
+        coords[kept] = self.coords[np.repeat(~circles, np.diff(self.offsets))]
+        coords[~kept] = rings
+
+        ring_sizes = np.diff(self.rings)
+        ring_sizes[circles[self.ring_rows()]] = np.diff(ring_offsets)
+        rings_out = np.zeros(len(ring_sizes) + 1, dtype=np.int64)
+        np.cumsum(ring_sizes, out=rings_out[1:])
+        kinds = np.where(circles, LINE, self.kinds)
+        return GeometryStore(coords, offsets, kinds, self.colors, rings_out if self.has_holes() else None)
+
+    def transform(self, matrix: np.ndarray, index: int = None):
+        """
+        Rewrites coordinates in place. `matrix` is one 3x3 matrix, or one matrix per row when
+        transforming the whole store. With `index` only that row is transformed.
+        """
+        self.generation += 1
+        if index is not None:
+            self.versions[index] += 1
+            transform_in_place(self.coords[self.offsets[index]:self.offsets[index + 1]], matrix)
+        elif matrix.ndim == 2:
+            self.versions += 1
+            transform_in_place(self.coords, matrix)
+        else:
+            self.versions += 1
+            transform_in_place(self.coords, np.repeat(matrix, np.diff(self.offsets), axis=0))
+
+    def write(self, index: int, geometry) -> bool:
+        # Zapíše souřadnice geometrie do řádku, pokud má řádek stejný druh a počet bodů
+        kind = self.kinds[index]
+        if kind == POINT and geometry.geom_type == "Point" or kind == LINE and geometry.geom_type == "LineString":
+            coords = shapely.get_coordinates(geometry)
+        elif kind == CIRCLE and geometry.geom_type == "LineString":
+            coords = shapely.get_coordinates(geometry)
+        elif kind == POLYGON and geometry.geom_type == "Polygon":
+            # Kruhy polygonu musí mít stejné počty bodů jako kruhy řádku
+            sizes = [len(ring.coords) for ring in (geometry.exterior, *geometry.interiors)]
+            if sizes != np.diff(self.row_rings(index)).tolist():
+                return False
+            coords = shapely.get_coordinates(geometry)
+        else:
+            return False
+
+        row = self.coordinates(index)
+        if len(coords) != len(row):
+            return False
+        row[:] = coords
+        self.generation += 1
+        self.versions[index] += 1
+        return True
@@ -0,0 +1,80 @@
+"""
+Names of a PolyDraw script: the symbol table used while building AST nodes and a static
+resolution pass that checks every name of a parsed program before anything is executed.
+
+The global scope is the `variables` dict given by the caller, so its bindings stay
+visible to them. A `repeat` body has its own scope, names defined in it are visible
+only to the later statements of the same body.
+"""
+
+from typing import Any
+
+def statement_names(parsed: dict) -> tuple[set[str], set[str], list[tuple[str, str]]]:
+    """Returns the variables a statement reads, the variables it defines or changes and the pairs of variables sharing nodes."""
+    match parsed["command"]:
+        case "point" | "line" | "polygon" | "circle" | "load":
+            return set(), {parsed["name"]}, []
+        case "list" | "query":
+            return set(parsed["geoms"]), {parsed["name"]}, [(parsed["name"], geom) for geom in parsed["geoms"]]
+        case "set_operation" | "measure":
+            return set(parsed["geoms"]), {parsed["name"]}, []
+        case "transform":
+            return {parsed["obj"]}, {parsed["obj"]}, []
+        case "plot" | "save":
+            return {parsed["name"]}, set(), []
+        case "repeat":
+            # Jména definovaná v těle cyklu jsou jeho lokální proměnné
+            reads, writes, aliases, local = set(), set(), [], set()
+            for el in parsed["body"]:
+                el_reads, el_writes, el_aliases = statement_names(el)
+                reads |= el_reads - local
+                if is_definition(el):
+                    local.add(el["name"])
+                writes |= el_writes
+                aliases += [pair for pair in el_aliases if not local & set(pair)]
+            return reads, writes - local, aliases
+        case _:
+            raise ValueError(f"Unknown command: {parsed['command']}")
+
+def is_definition(parsed: dict) -> bool:
+    return parsed["command"] not in ("transform", "plot", "save", "repeat")
+
+def resolve(statements: list[dict], names: set[str]) -> set[str]:
+    """
+    Checks that every statement reads only names defined before it, `names` are the
+    variables defined before the program. Returns the names the program defines globally.
+    """
+    names = set(names)
+    for parsed in statements:
+        if parsed["command"] == "repeat":
+            resolve(parsed["body"], names)
+            continue
+        reads, _, _ = statement_names(parsed)
+        for name in reads:
+            if name not in names:
+                raise ValueError(f"Unknown geometry variable: {name}")
+        if is_definition(parsed):
+            names.add(parsed["name"])
+    return names
+
+class SymbolTable:
+    def __init__(self, variables: dict | None = None, parent: "SymbolTable | None" = None):
+        self.variables = {} if variables is None else variables
+        self.parent = parent
+
+    def lookup(self, name: str) -> Any:
+        scope = self
+        while scope is not None:
+            if name in scope.variables:
+                return scope.variables[name]
+            scope = scope.parent
+        raise ValueError(f"Unknown geometry variable: {name}")
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.variables or (self.parent is not None and name in self.parent)
+
+    def define(self, name: str, value: Any):
+        self.variables[name] = value
+
+    def scope(self) -> "SymbolTable":
+        return SymbolTable(parent=self)
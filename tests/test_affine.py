@@ -0,0 +1,35 @@
+from src.affine import translation_matrix, rotation_matrix, scale_matrix, operation_matrix, apply_matrix
+from src.my_ast import PolygonNode, PointNode, GeometryListNode, TransformNode
+from shapely import Polygon, equals_exact
+from shapely.affinity import rotate, scale
+import numpy as np
+
+def test_matrices_match_shapely_affinity():
+    polygon = Polygon([(0, 0), (2, 1), (1, 3)])
+
+    rotated = apply_matrix(np.array([polygon]), rotation_matrix(37, (1, -2)))[0]
+    scaled = apply_matrix(np.array([polygon]), scale_matrix(0.5, 0.5, (3, 3)))[0]
+    translated = apply_matrix(np.array([polygon]), translation_matrix(1, 2))[0]
+
+    assert equals_exact(rotated, rotate(polygon, 37, origin=(1, -2)), 0)
+    assert equals_exact(scaled, scale(polygon, 0.5, 0.5, origin=(3, 3)), 0)
+    assert list(translated.exterior.coords) == [(1, 2), (3, 3), (2, 5), (1, 2)]
+
+def test_operation_matrix_center_origin():
+    polygons = np.array([Polygon([(0, 0), (2, 0), (2, 2)]), Polygon([(10, 10), (12, 10), (12, 14)])])
+
+    matrices = operation_matrix("rotate", {"angle": 45, "origin": "center"}, polygons)
+    rotated = apply_matrix(polygons, matrices)
+
+    assert matrices.shape == (2, 3, 3)
+    assert all(equals_exact(r, rotate(p, 45, origin="center"), 0) for r, p in zip(rotated, polygons))
+
+def test_transform_node_list():
+    nodes = GeometryListNode()
+    nodes.add(PolygonNode([(0, 0), (1, 1), (1, 0)]))
+    nodes.add(PointNode((2, 2)))
+
+    TransformNode(nodes, operation="scale", factor=2, origin="center").evaluate()
+
+    assert list(nodes.geometries[0].evaluate().exterior.coords) == [(-0.5, -0.5), (1.5, 1.5), (1.5, -0.5), (-0.5, -0.5)]
+    assert (nodes.geometries[1].evaluate().x, nodes.geometries[1].evaluate().y) == (2, 2)
@@ -0,0 +1,66 @@
+from src.animation import Animation
+from src.my_ast import PolygonNode, GeometryListNode, DrawNode, TransformNode, RepeatCycleNode
+from src.parser import parse_commands
+from src.raster import RasterRenderer
+from PIL import Image, ImageSequence
+import pytest
+
+def make_scene(path: str) -> RepeatCycleNode:
+    nodes = GeometryListNode()
+    nodes.add(PolygonNode([(0, 0), (4, 0), (4, 4), (0, 4)], color=[255, 0, 0]))
+    nodes.pack()
+    body = [TransformNode(nodes, "translate", x=1, y=0), DrawNode(nodes)]
+    return RepeatCycleNode(5, body, Animation(path, duration=50, frames=RasterRenderer(size=(80, 40))))
+
+@pytest.mark.parametrize("name", ["scene.gif", "scene.png"])
+def test_repeat_streams_frames(tmp_path, name):
+    make_scene(str(tmp_path / name)).evaluate()
+
+    image = Image.open(tmp_path / name)
+    frames = [frame.convert("RGB") for frame in ImageSequence.Iterator(image)]
+    assert image.n_frames == 5
+    assert image.size == (80, 40)
+    # Výřez je pevný podle prvního snímku, čtverec se posouvá doprava
+    assert frames[0].getpixel((25, 20)) != (255, 255, 255)
+    assert frames[0].getpixel((75, 20)) == (255, 255, 255)
+    assert frames[-1].getpixel((25, 20)) == (255, 255, 255)
+    assert frames[-1].getpixel((75, 20)) != (255, 255, 255)
+
+def test_repeat_restores_renderer(tmp_path):
+    from src.render import get_renderer
+    previous = get_renderer()
+
+    make_scene(str(tmp_path / "scene.gif")).evaluate()
+
+    assert get_renderer() is previous
+
+def test_repeat_output_in_script(tmp_path):
+    path = tmp_path / "anim.gif"
+    code = f"""
+polygon p1:
+    points = (0 0, 1 1, 1 0)
+    color = (255, 0, 0)
+
+list l:
+    [p1]
+
+repeat 3 output = {path.as_posix()}:
+    rotate l: angle = 30 origin = center
+    plot l
+"""
+    parse_commands(code, {})
+
+    assert Image.open(path).n_frames == 3
+
+def test_unknown_animation_format(tmp_path):
+    with pytest.raises(ValueError):
+        make_scene(str(tmp_path / "scene.mp4")).evaluate()
+
+def test_parallel_frames_match_sequential(tmp_path):
+    make_scene(str(tmp_path / "sequential.png")).evaluate()
+    scene = make_scene(str(tmp_path / "parallel.png"))
+    scene.animation.workers = 2
+    scene.evaluate()
+
+    assert (tmp_path / "parallel.png").read_bytes() == (tmp_path / "sequential.png").read_bytes()
+    assert scene.animation.pool is None
@@ -0,0 +1,56 @@
+from src.batch import run_batch, read_manifest
+import os
+
+script = """
+polygon p:
+    points = (0 0, 1 1, 1 0)
+    color = (255, 0, 0)
+
+plot p
+"""
+
+def test_run_batch(tmp_path):
+    (tmp_path / "first.pd").write_text(script)
+    (tmp_path / "second.pd").write_text(script.replace("plot p", "translate p: x = 1 y = 1"))
+    (tmp_path / "broken.pd").write_text("plot missing\n")
+    (tmp_path / "scripts.txt").write_text("first.pd\n\n# skipped\nsecond.pd\nbroken.pd\n")
+    output = tmp_path / "out"
+
+    scripts = read_manifest(str(tmp_path / "scripts.txt"))
+    results = {os.path.basename(result["script"]): result for result in run_batch(scripts, workers=1, output=str(output), renderer="raster")}
+
+    assert set(results) == {"first.pd", "second.pd", "broken.pd"}
+    assert results["first.pd"]["error"] is None and results["first.pd"]["output"] == str(output / "first.png")
+    assert (output / "first.png").exists()
+    assert results["second.pd"]["error"] is None and results["second.pd"]["output"] is None
+    assert results["broken.pd"]["error"] == "ValueError: Unknown geometry variable: missing"
+
+def test_run_batch_with_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("POLYDRAW_CACHE", str(tmp_path / "cache"))
+    (tmp_path / "first.pd").write_text(script)
+
+    for _ in range(2):
+        [result] = run_batch([str(tmp_path / "first.pd")], workers=1, output=str(tmp_path / "out"), renderer="raster", cache=True)
+        assert result["error"] is None and result["output"] == str(tmp_path / "out" / "first.png")
+    assert len(list((tmp_path / "cache").glob("*.json"))) == 1
+
+def test_scripts_with_the_same_name(tmp_path):
+    for directory in ("d1", "d2"):
+        (tmp_path / directory).mkdir()
+        (tmp_path / directory / "a.pd").write_text(script)
+    scripts = [str(tmp_path / "d1" / "a.pd"), str(tmp_path / "d2" / "a.pd"), str(tmp_path / "d1" / "a.pd")]
+    output = tmp_path / "out"
+
+    results = {result["output"] for result in run_batch(scripts, workers=2, output=str(output), renderer="raster")}
+
+    assert results == {str(output / "d1" / "a.png"), str(output / "d2" / "a.png"), str(output / "d1" / "a-2.png")}
+    assert all(os.path.exists(path) for path in results)
+
+def test_batch_checks_names_before_running(tmp_path):
+    saved = tmp_path / "saved.npz"
+    (tmp_path / "broken.pd").write_text(script.replace("plot p", f"save p: {saved.as_posix()}\n\nplot missing"))
+
+    [result] = run_batch([str(tmp_path / "broken.pd")], workers=1, output=str(tmp_path / "out"), renderer="raster")
+
+    assert result["error"] == "ValueError: Unknown geometry variable: missing"
+    assert not saved.exists()
@@ -0,0 +1,84 @@
+from src.cache import ProgramCache, run_cached, cache_key
+from src.parser import parse_commands, parse_program
+import src.cache
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+
+script = """
+polygon p1:
+    points = (0 0, 1 1, 1 0)
+    color = (255, 0, 0)
+
+circle c:
+    center = (2 3)
+    radius = 1.5
+    color = (0, 0, 255)
+
+list l:
+    [p1, c]
+
+rotate l: angle = 30 origin = (1 1)
+
+query q: l box = (0 0, 2 2)
+"""
+
+def test_cached_program_matches_parsed(tmp_path):
+    cache = ProgramCache(str(tmp_path))
+
+    first = cache.compile(script)
+    second = cache.compile(script)
+
+    assert (cache.misses, cache.hits) == (1, 1)
+    assert repr(first) == repr(parse_program(script))
+    assert isinstance(second[0]["points"].base, np.memmap)
+    assert second[0]["points"].tolist() == first[0]["points"].tolist()
+    assert second[3]["kwargs"] == {"angle": 30, "origin": (1, 1)}
+
+def test_run_cached(tmp_path):
+    cache = ProgramCache(str(tmp_path))
+    run_cached(script, {}, cache)
+
+    variables = run_cached(script, {}, cache)
+    expected = parse_commands(script, {})
+
+    assert cache.hits == 1
+    assert [node.evaluate().wkt for node in variables["l"].geometries] == [node.evaluate().wkt for node in expected["l"].geometries]
+    assert len(variables["q"].geometries) == len(expected["q"].geometries)
+
+def test_run_cached_checks_names_first(tmp_path):
+    cache = ProgramCache(str(tmp_path / "cache"))
+    output = tmp_path / "saved.npz"
+    code = f"point a: (1 1) color = (0, 0, 0)\nsave a: {output.as_posix()}\nplot missing\n"
+
+    with pytest.raises(ValueError, match="Unknown geometry variable: missing"):
+        run_cached(code, {}, cache)
+    assert not output.exists()
+
+def test_key_depends_on_version(monkeypatch):
+    key = cache_key(script)
+    monkeypatch.setattr(src.cache, "__version__", "0.0.0")
+
+    assert cache_key(script) != key
+
+def test_damaged_cache_is_parsed_again(tmp_path):
+    cache = ProgramCache(str(tmp_path))
+    cache.compile(script)
+    structure_path, _ = cache.paths(script)
+    with open(structure_path, "w") as file:
+        file.write("{")
+
+    assert repr(cache.compile(script)) == repr(parse_program(script))
+    assert cache.misses == 2
+
+def test_concurrent_saves(tmp_path):
+    statements = parse_program(script)
+    caches = [ProgramCache(str(tmp_path)) for _ in range(8)]
+
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda cache: cache.save(script, statements), caches))
+
+    loaded = ProgramCache(str(tmp_path)).load(script)
+    assert [statement["command"] for statement in loaded] == [statement["command"] for statement in statements]
+    assert loaded[0]["points"].tolist() == statements[0]["points"].tolist()
+    assert sorted(path.suffix for path in tmp_path.iterdir()) == [".json", ".npy"]
@@ -0,0 +1,65 @@
+from src.daemon import RenderService, RenderClient, parse_address, program
+import asyncio
+import pytest
+
+script = """
+polygon p:
+    points = (0 0, 1 1, 1 0)
+    color = (255, 0, 0)
+
+plot p
+"""
+
+def test_parse_address():
+    assert parse_address("127.0.0.1:8765") == ("127.0.0.1", 8765)
+    assert parse_address("[::1]:8765") == ("::1", 8765)
+    assert parse_address("localhost:8765") == ("localhost", 8765)
+    assert parse_address("/tmp/polydraw.sock") == "/tmp/polydraw.sock"
+    for address in ("0.0.0.0:8765", "192.168.1.10:8765", "example.com:8765"):
+        with pytest.raises(ValueError, match="only on a loopback address"):
+            parse_address(address)
+
+def test_file_commands_are_rejected(tmp_path):
+    path = (tmp_path / "out.npz").as_posix()
+    for code in (f"load a: {path}\nplot a\n", f"{script}\nsave p: {path}\n", f"{script}\nrepeat 2 output = {tmp_path.as_posix()}/a.gif:\n    plot p\n"):
+        with pytest.raises(ValueError, match="Commands working with files are not allowed"):
+            program(code)
+    assert list(tmp_path.iterdir()) == []
+
+def test_program_is_cached_by_script():
+    first, cached = program(script)
+    second, cached_again = program(script)
+
+    assert not cached and cached_again
+    assert second is first
+
+def test_render_service(tmp_path):
+    address = str(tmp_path / "polydraw.sock")
+
+    async def session():
+        service = RenderService(workers=2, renderer="raster")
+        await service.start(address)
+        try:
+            client = await RenderClient.connect(address)
+            clients = await asyncio.gather(*(RenderClient.connect(address) for _ in range(2)))
+            results = await asyncio.gather(*(other.render(script) for other in clients))
+            image = await client.render(script)
+            again = await client.render(script)
+            with pytest.raises(ValueError, match="Unknown geometry variable: missing"):
+                await client.render("plot missing\n")
+            with pytest.raises(ValueError, match="Commands working with files are not allowed in the render service: load"):
+                await client.render("load a: /etc/hosts.npy\nplot a\n")
+            with pytest.raises(ValueError, match="Script has no plot"):
+                await client.render("point a: (1 1) color = (0, 0, 0)\n")
+            # Spojení po chybě dál funguje
+            after_error = await client.render(script)
+            for other in [client] + clients:
+                await other.close()
+        finally:
+            await service.stop()
+        return results, image, again, after_error
+
+    results, image, again, after_error = asyncio.run(session())
+
+    assert image.startswith(b"\x89PNG")
+    assert image == again == after_error == results[0] == results[1]
@@ -0,0 +1,113 @@
+from src.formats import read_store, write_store
+from src.parser import parse_commands, load_file, save_file
+from src.store import GeometryStore, POINT, LINE, POLYGON, CIRCLE
+from src.my_ast import GeometryListNode
+import numpy as np
+import pytest
+import shapely
+
+script = """
+polygon p1:
+    points = (0 0, 4 0, 4 4, 0 4, 0 0)
+    color = (255, 0, 0)
+
+circle c:
+    center = (2 3)
+    radius = 1.5
+    color = (0, 0, 255)
+
+line l1:
+    points = (0 0, 1 1, 2 0)
+    color = (0, 255, 0)
+
+point pt:
+    coord = (5 5)
+    color = (10, 20, 30)
+
+list l:
+    [p1, c, l1, pt]
+"""
+
+def is_mapped(array: np.ndarray) -> bool:
+    while array is not None and not isinstance(array, np.memmap):
+        array = array.base
+    return array is not None
+
+def test_npz_roundtrip_is_memory_mapped(tmp_path):
+    variables = parse_commands(script, {})
+    path = str(tmp_path / "shapes.npz")
+    save_file(variables, "l", path)
+
+    loaded = load_file(path, variables, "copy")
+
+    assert isinstance(loaded, GeometryListNode) and loaded.is_packed()
+    assert is_mapped(loaded.store.coords)
+    assert loaded.store.kinds.tolist() == [POLYGON, CIRCLE, LINE, POINT]
+    assert loaded.store.colors.tolist() == [[255, 0, 0], [0, 0, 255], [0, 255, 0], [10, 20, 30]]
+    assert [node.evaluate().wkt for node in loaded.geometries] == [node.evaluate().wkt for node in variables["l"].geometries]
+
+def test_transform_does_not_change_file(tmp_path):
+    path = str(tmp_path / "shapes.npz")
+    variables = parse_commands(script + f"\nsave l: {path}\nload m: {path}\ntranslate m: x = 1 y = 2\n", {})
+
+    assert variables["m"].geometries[3].evaluate().coords[0] == (6, 7)
+    assert read_store(path).coords[-1].tolist() == [5, 5]
+
+def test_save_over_loaded_file(tmp_path):
+    path = str(tmp_path / "shapes.npz")
+    variables = parse_commands(script + f"\nsave l: {path}\nload m: {path}\nscale m: factor = 2 origin = (0 0)\nsave m: {path}\n", {})
+
+    assert read_store(path).coords[-1].tolist() == [10, 10]
+    assert variables["m"].geometries[3].evaluate().coords[0] == (10, 10)
+
+def test_npz_with_holes(tmp_path):
+    polygon = shapely.Polygon([(0, 0), (10, 0), (10, 10), (0, 10)], [[(2, 2), (4, 2), (4, 4), (2, 2)]])
+    store = GeometryStore.from_geometries([polygon, shapely.Point(1, 1)], [POLYGON, POINT], [(1, 2, 3), (4, 5, 6)])
+    path = str(tmp_path / "holes.npz")
+    write_store(store, path)
+
+    assert read_store(path).geometries()[0].equals(polygon)
+
+def test_npy_coordinates(tmp_path):
+    squares = np.array([[(0, 0), (1, 0), (1, 1), (0, 0)], [(5, 5), (6, 5), (6, 6), (5, 5)]], dtype=np.float64)
+    np.save(tmp_path / "squares.npy", squares)
+    np.save(tmp_path / "points.npy", squares[:, 0])
+    np.save(tmp_path / "lines.npy", squares[:, :3])
+
+    assert read_store(str(tmp_path / "squares.npy")).kinds.tolist() == [POLYGON, POLYGON]
+    assert read_store(str(tmp_path / "points.npy")).kinds.tolist() == [POINT, POINT]
+    lines = read_store(str(tmp_path / "lines.npy"))
+    assert lines.kinds.tolist() == [LINE, LINE]
+    assert lines.geometries()[1].wkt == "LINESTRING (5 5, 6 5, 6 6)"
+
+    write_store(lines, str(tmp_path / "copy.npy"))
+    assert np.array_equal(np.load(tmp_path / "copy.npy"), squares[:, :3])
+
+def test_npy_needs_equal_rows(tmp_path):
+    variables = parse_commands(script, {})
+
+    with pytest.raises(ValueError):
+        save_file(variables, "l", str(tmp_path / "shapes.npy"))
+
+def test_wkb_roundtrip(tmp_path):
+    variables = parse_commands(script, {})
+    path = str(tmp_path / "shapes.wkb")
+    save_file(variables, "l", path)
+
+    loaded = read_store(path)
+
+    # Kružnice se uloží jako polygon, barvy se neukládají
+    assert loaded.kinds.tolist() == [POLYGON, POLYGON, LINE, POINT]
+    assert all(a.equals(b) for a, b in zip(loaded.geometries(), variables["l"].store.geometries()))
+
+def test_wkb_multipart(tmp_path):
+    path = tmp_path / "multi.wkb"
+    path.write_bytes(shapely.to_wkb(shapely.MultiPoint([(0, 0), (1, 1)])))
+
+    assert read_store(str(path)).kinds.tolist() == [POINT, POINT]
+
+def test_unknown_format(tmp_path):
+    variables = parse_commands(script, {})
+
+    with pytest.raises(ValueError):
+        save_file(variables, "l", str(tmp_path / "shapes.txt"))
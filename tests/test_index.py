@@ -0,0 +1,55 @@
+from src.my_ast import PolygonNode, PointNode, GeometryListNode, TransformNode, DrawNode, QueryNode
+from src.raster import RasterRenderer
+import numpy as np
+
+def make_grid(size: int = 10) -> GeometryListNode:
+    nodes = GeometryListNode()
+    for x in range(size):
+        for y in range(size):
+            nodes.add(PolygonNode([(x, y), (x + 0.5, y), (x, y + 0.5)], color=[255, 0, 0]))
+    nodes.pack()
+    return nodes
+
+def test_index_rebuilds_after_transform():
+    nodes = make_grid()
+    index = nodes.spatial_index()
+
+    assert index.intersecting((0.1, 0.1, 1.1, 1.1)).tolist() == [0, 1, 10, 11]
+    assert index.intersecting((0.1, 0.1, 1.1, 1.1)).tolist() == [0, 1, 10, 11]
+    assert index.builds == 1
+
+    TransformNode(nodes, "translate", x=100, y=0).evaluate()
+
+    assert index.intersecting((0.1, 0.1, 1.1, 1.1)).tolist() == []
+    assert index.intersecting((100.1, 0.1, 101.1, 1.1)).tolist() == [0, 1, 10, 11]
+    assert index.builds == 2
+    assert nodes.spatial_index() is index
+
+def test_intersecting_refines_candidates():
+    nodes = make_grid(2)
+    index = nodes.spatial_index()
+
+    # Obálka trojúhelníku protíná obdélník, trojúhelník sám ne
+    assert index.candidates((0.4, 0.4, 0.6, 0.6)).tolist() == [0]
+    assert index.intersecting((0.4, 0.4, 0.6, 0.6)).tolist() == []
+
+def test_query_returns_same_nodes():
+    nodes = make_grid()
+    points = [PointNode((1, 1)), PointNode((50, 50))]
+
+    selection = QueryNode([nodes], (4.9, 4.9, 5.1, 5.1)).evaluate()
+    unpacked = QueryNode(points, (0, 0, 2, 2)).evaluate()
+
+    assert selection.geometries == [nodes.geometries[55]]
+    assert unpacked.geometries == [points[0]]
+
+def test_plot_culls_outside_extent(tmp_path):
+    nodes = make_grid()
+    renderer = RasterRenderer(path=str(tmp_path / "frame.png"), size=(40, 40))
+    renderer.extent = (np.array([0, 0]), np.array([1.2, 1.2]))
+
+    store = DrawNode(nodes).store(renderer.extent)
+
+    assert len(store) == 4
+    assert store.coords[:4].tolist() == nodes.store.coords[:4].tolist()
+    DrawNode(nodes, renderer=renderer).evaluate()
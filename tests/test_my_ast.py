@@ -1,5 +1,8 @@
-from src.my_ast import PointNode, LineNode, PolygonNode, CircleNode, TransformNode
+from src.my_ast import PointNode, LineNode, PolygonNode, CircleNode, TransformNode, GeometryListNode, RepeatCycleNode, DrawNode, SetOperationNode, MeasureNode, materialize, measure_stats, reset_measure_stats
 from shapely import Point
+from shapely.affinity import translate
+from src.store import POLYGON
+import numpy as np
 
 def test_point_node_initialization():
     xy = (5, 10)
@@ -77,4 +80,172 @@ def test_transform_node_scale_dict():
     transform_node = TransformNode(polygon_node, operation='scale', kwargs={"factor": 2, "origin": (0,0)})
 
     transform_node.evaluate()
-    assert list(polygon_node.evaluate().exterior.coords) == [(0, 0), (2, 2), (2, 0), (0, 0)], "TransformNode does not correctly scale polygon."
\ No newline at end of file
+    assert list(polygon_node.evaluate().exterior.coords) == [(0, 0), (2, 2), (2, 0), (0, 0)], "TransformNode does not correctly scale polygon."
+
+def test_repeat_cycle_composes_affine_body():
+    polygon_node = PolygonNode([(0, 0), (1, 1), (1, 0)])
+    reference = PolygonNode([(0, 0), (1, 1), (1, 0)])
+    body = [
+        TransformNode(polygon_node, operation='rotate', angle=7, origin=(1, 2)),
+        TransformNode(polygon_node, operation='scale', factor=1.01, origin=(0, 0)),
+    ]
+    cycle = RepeatCycleNode(50, body)
+
+    cycle.evaluate()
+    for _ in range(50):
+        TransformNode(reference, operation='rotate', angle=7, origin=(1, 2)).evaluate()
+        TransformNode(reference, operation='scale', factor=1.01, origin=(0, 0)).evaluate()
+
+    assert cycle.effect is not None, "RepeatCycleNode does not compose a pure affine body."
+    assert np.allclose(polygon_node.evaluate().exterior.coords, reference.evaluate().exterior.coords), "Composed cycle differs from step by step evaluation."
+
+def test_repeat_cycle_duplicate_list_members():
+    polygon_node = PolygonNode([(0, 0), (1, 1), (1, 0)])
+    nodes = GeometryListNode()
+    nodes.add(polygon_node)
+    nodes.add(polygon_node)
+
+    RepeatCycleNode(3, [RepeatCycleNode(2, [TransformNode(nodes, operation='translate', x=1, y=0)])]).evaluate()
+
+    assert list(polygon_node.evaluate().exterior.coords) == [(12, 0), (13, 1), (13, 0), (12, 0)], "Duplicate list members are not transformed for each occurrence."
+
+def test_repeat_cycle_with_plot_is_not_composed():
+    polygon_node = PolygonNode([(0, 0), (1, 1), (1, 0)])
+    cycle = RepeatCycleNode(2, [TransformNode(polygon_node, operation='translate', x=1, y=0), DrawNode(polygon_node)])
+
+    assert cycle.effect is None, "Cycle with plot must keep intermediate states."
+    assert RepeatCycleNode(2, [TransformNode(polygon_node, operation='rotate', angle=5)]).effect is None, "Rotation around center depends on the geometry."
+
+def test_compiled_cycle_matches_evaluate():
+    def scene():
+        single = PolygonNode([(0, 0), (1, 1), (1, 0)])
+        nodes = GeometryListNode()
+        for i in range(3):
+            nodes.add(PolygonNode([(i, 0), (i + 1, 2), (i + 1, 0)]))
+        nodes.pack()
+        body = [
+            TransformNode(single, operation='translate', x=1, y=0),
+            TransformNode(nodes, operation='scale', factor=1.1, origin=(0, 0)),
+            TransformNode(nodes, operation='rotate', angle=10, origin='center'),
+            TransformNode(single, operation='rotate', angle=10, origin='centroid'),
+        ]
+        return single, nodes, RepeatCycleNode(5, body)
+
+    single, nodes, cycle = scene()
+    reference_single, reference_nodes, reference_cycle = scene()
+
+    cycle.compile()()
+    for _ in range(5):
+        for el in reference_cycle.body:
+            el.evaluate()
+
+    assert cycle.effect is None
+    assert np.allclose(single.evaluate().exterior.coords, reference_single.evaluate().exterior.coords)
+    assert np.allclose(nodes.store.coords, reference_nodes.store.coords)
+
+def test_transform_node_pending_until_evaluated():
+    polygon_node = PolygonNode([(0, 0), (1, 1), (1, 0)])
+    base_polygon = polygon_node.geometry
+
+    TransformNode(polygon_node, operation='translate', x=1, y=0).evaluate()
+    TransformNode(polygon_node, operation='scale', factor=2, origin=(0, 0)).evaluate()
+
+    assert polygon_node.geometry is base_polygon, "Transforms with fixed origin should be deferred."
+    assert np.array_equal(polygon_node.pending, [[2, 0, 2], [0, 2, 0], [0, 0, 1]]), "Deferred transforms are not composed."
+    assert list(polygon_node.evaluate().exterior.coords) == [(2, 0), (4, 2), (4, 0), (2, 0)]
+    assert polygon_node.pending is None
+
+def test_materialize_nodes():
+    nodes = [PolygonNode([(0, 0), (1, 1), (1, 0)]), PointNode((1, 1)), LineNode(points=[(0, 0), (1, 0)])]
+    for node in nodes + [nodes[0]]:
+        TransformNode(node, operation='translate', x=0, y=1).evaluate()
+
+    materialize(nodes + [nodes[0]])
+
+    assert all(node.pending is None for node in nodes)
+    assert list(nodes[0].geometry.exterior.coords) == [(0, 2), (1, 3), (1, 2), (0, 2)]
+    assert (nodes[1].geometry.x, nodes[1].geometry.y) == (1, 2)
+    assert list(nodes[2].geometry.coords) == [(0, 1), (1, 1)]
+
+def test_union_keeps_holes():
+    frame = GeometryListNode()
+    for ring in [[(0, 0), (3, 0), (3, 1), (0, 1)], [(0, 2), (3, 2), (3, 3), (0, 3)], [(0, 0), (1, 0), (1, 3), (0, 3)], [(2, 0), (3, 0), (3, 3), (2, 3)]]:
+        frame.add(PolygonNode(ring, color=[0, 255, 0]))
+    frame.pack()
+
+    union = SetOperationNode([frame], "union").evaluate()
+
+    assert len(union.geometries) == 1 and union.is_packed()
+    assert len(union.geometries[0].evaluate().interiors) == 1
+    assert MeasureNode([union], "area").evaluate().tolist() == [8]
+    assert MeasureNode([union], "perimeter").evaluate().tolist() == [16]
+
+def test_intersection_of_disjoint_is_empty():
+    nodes = [PolygonNode([(0, 0), (1, 0), (1, 1)]), PolygonNode([(5, 5), (6, 5), (6, 6)])]
+
+    assert SetOperationNode(nodes, "intersection").evaluate().geometries == []
+
+def test_union_repairs_invalid_polygons():
+    bowtie = PolygonNode([(0, 0), (2, 2), (2, 0), (0, 2)])
+
+    union = SetOperationNode([bowtie], "union").evaluate()
+
+    assert sum(node.evaluate().area for node in union.geometries) == 2
+
+def test_circle_transform_keeps_control_points():
+    circle_node = CircleNode((3, 4), 2)
+
+    TransformNode(circle_node, operation="rotate", angle=90, origin="center").evaluate()
+    TransformNode(circle_node, operation="scale", factor=2, origin=(0, 0)).evaluate()
+
+    assert len(circle_node.stored().coords) == 3
+    assert circle_node.evaluate().hausdorff_distance(Point(6, 8).buffer(4)) < 1e-12
+
+def test_circle_set_to_polygon():
+    circle_node = CircleNode((0, 0), 1)
+    moved = translate(circle_node.evaluate(), 1, 1)
+
+    circle_node.set_geometry(moved)
+    assert circle_node.evaluate().equals(moved)
+
+    packed = CircleNode((0, 0), 1)
+    geom_list = GeometryListNode()
+    geom_list.add(packed)
+    geom_list.pack()
+    packed.set_geometry(moved)
+    geom_list.pack()
+    assert geom_list.store.kinds.tolist() == [POLYGON]
+    assert packed.evaluate().equals(moved)
+
+def test_measures_are_cached_by_version():
+    polygon_node = PolygonNode([(0, 0), (2, 0), (2, 2), (0, 2)])
+    reset_measure_stats()
+
+    assert polygon_node.measure("area") == 4
+    assert polygon_node.measure("area") == 4
+    assert polygon_node.measure("bounds").tolist() == [0, 0, 2, 2]
+    assert measure_stats == {"hits": 1, "misses": 2}
+
+    TransformNode(polygon_node, operation="scale", factor=2, origin=(0, 0)).evaluate()
+
+    assert polygon_node.measure("area") == 16
+    assert polygon_node.measure("centroid").equals(Point(2, 2))
+    assert measure_stats == {"hits": 1, "misses": 4}
+
+def test_packed_measures_invalidate_changed_rows():
+    nodes = GeometryListNode()
+    for i in range(3):
+        nodes.add(PolygonNode([(i, 0), (i + 1, 0), (i + 1, 1)]))
+    nodes.pack()
+    area = MeasureNode([nodes], "area")
+    reset_measure_stats()
+
+    area.evaluate()
+    TransformNode(nodes.geometries[1], operation="scale", factor=2, origin=(0, 0)).evaluate()
+    area.evaluate()
+    assert measure_stats == {"hits": 2, "misses": 4}
+    assert area.values.tolist() == [0.5, 2, 0.5]
+
+    TransformNode(nodes, operation="scale", factor=2, origin=(0, 0)).evaluate()
+    assert area.evaluate().tolist() == [2, 8, 2]
+    assert measure_stats == {"hits": 2, "misses": 7}
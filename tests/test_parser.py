@@ -1,6 +1,11 @@
 from src.my_ast import PointNode, LineNode, PolygonNode, CircleNode
-from src.parser import parse_point, parse_line, parse_polygon, parse_commands, parse_circle
+from src.parser import parse_point, parse_line, parse_polygon, parse_commands, parse_circle, points_list, stream_blocks, run_lines, run_file, tokenize_script_to_blocks, parse_set_operation, parse_repeat_cycle
+from src.render import get_renderer, set_renderer
+import numpy as np
+import subprocess
+import sys
 import pytest
+from parsy import ParseError
 
 def test_point_parse():
     polygon_str = "point p: (3 4) color = (255, 0, 0)"
@@ -309,4 +314,207 @@ plot c1
     """
         
     parsed = parse_commands(code, {})
-    assert len(parsed) == 1
\ No newline at end of file
+    assert len(parsed) == 1
+
+def test_statement_after_cycle():
+    code = """
+polygon p1:
+    points = (0 0, 1 1, 1 0)
+    color = (255, 0, 0)
+
+repeat 2:
+    translate p1:
+        x = 1
+        y = 0
+translate p1:
+    x = 0
+    y = 1
+    """
+
+    parsed = parse_commands(code, {})
+    assert list(parsed["p1"].evaluate().exterior.coords) == [(2, 1), (3, 2), (3, 1), (2, 1)]
+
+def test_unknown_command():
+    code = """
+polygon p1:
+    points = (0 0, 1 1, 1 0)
+    color = (255, 0, 0)
+
+hexagon h1:
+    points = (0 0)
+    """
+
+    with pytest.raises(ValueError, match="Unknown command: hexagon h1:"):
+        parse_commands(code, {})
+
+def test_repeat_workers_without_output():
+    code = "point a: (0 0) color = (0, 0, 0)\nrepeat 5 workers = 4:\n    translate a: x = 1 y = 0\n"
+
+    with pytest.raises(ValueError, match="Repeat with workers needs an output file"):
+        parse_commands(code, {})
+
+def test_syntax_error_position():
+    code = "polygon p1:\n    points = (0 0, 1 x, 1 0)\n    color = (255, 0, 0)\n"
+
+    with pytest.raises(ParseError) as error:
+        parse_commands(code, {})
+    assert error.value.index == code.index("1 x") + 2
+
+def test_points_list_bulk():
+    coords = points_list.parse("(1 2, 3.5 -4,5-6 , -7.25 8)")
+
+    assert isinstance(coords, np.ndarray)
+    assert coords.dtype == np.float64
+    assert coords.tolist() == [[1, 2], [3.5, -4], [5, -6], [-7.25, 8]]
+    assert points_list.parse("[]").shape == (0, 2)
+
+def test_points_list_error_position():
+    for literal, position in [("(1 2, 3 4, 5)", 12), ("(1 2, 34)", 8), ("(1 2 3 4)", 5), ("(1.5.2 3)", 4)]:
+        with pytest.raises(ParseError) as error:
+            points_list.parse(literal)
+        assert error.value.index == position, literal
+
+def test_set_operations_and_measures():
+    code = """
+polygon a:
+    points = (0 0, 2 0, 2 2, 0 2)
+    color = (255, 0, 0)
+
+polygon b:
+    points = (1 1, 3 1, 3 3, 1 3)
+    color = (0, 0, 255)
+
+list l:
+    [a, b]
+
+union u: l
+intersection i: [a, b]
+area s: [u, i]
+perimeter o: u
+"""
+    variables = parse_commands(code, {})
+
+    assert variables["u"].geometries[0].evaluate().area == 7
+    assert variables["u"].geometries[0].color == [255, 0, 0]
+    assert variables["i"].geometries[0].evaluate().area == 1
+    assert variables["s"].values.tolist() == [7, 1]
+    assert variables["o"].values.tolist() == [12]
+
+def test_query_box():
+    code = """
+point a:
+    (1 1)
+    color = (255, 0, 0)
+
+point b:
+    (5 5)
+    color = (255, 0, 0)
+
+list l:
+    [a, b]
+
+query q: l box = (0 0, 2 2)
+"""
+    variables = parse_commands(code, {})
+
+    assert variables["q"].geometries == [variables["a"]]
+
+stream_code = """
+  polygon p1:
+    points = (0 0, 1 1, 1 0)
+    color = (255, 0, 0)
+
+point p2:
+
+    (3 3)
+    color = (0, 0, 255)
+list l:
+    [p1, p2]
+
+repeat 2:
+    translate l: x = 1 y = 0
+
+    plot l
+"""
+
+def test_stream_blocks():
+    assert list(stream_blocks(stream_code.splitlines(keepends=True))) == tokenize_script_to_blocks(stream_code)
+
+def test_stream_blocks_are_lazy():
+    read = []
+    def lines():
+        for line in stream_code.splitlines():
+            read.append(line)
+            yield line
+
+    blocks = stream_blocks(lines())
+    assert next(blocks).startswith("polygon p1:")
+    # Blok se vrátí hned se začátkem dalšího bloku
+    assert read[-1] == "point p2:"
+
+def test_run_file(tmp_path):
+    code = stream_code.replace("    plot l\n", "")
+    path = tmp_path / "script.pd"
+    path.write_text(code, encoding="utf-8")
+
+    variables = run_file(str(path), {})
+    expected = parse_commands(code, {})
+
+    assert list(variables) == list(expected)
+    assert [node.evaluate().wkt for node in variables["l"].geometries] == [node.evaluate().wkt for node in expected["l"].geometries]
+    assert run_lines(iter(code.splitlines()), {})["p2"].evaluate().wkt == "POINT (5 3)"
+
+def test_import_does_not_load_plotting_libraries():
+    # matplotlib a Pillow se načtou až při vykreslení
+    code = "import sys, src.parser; print(' '.join(name for name in ('matplotlib', 'PIL', 'src.animation') if name in sys.modules))"
+    loaded = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.split()
+
+    assert loaded == []
+
+def test_set_operation_is_evaluated_when_executed():
+    variables = parse_commands("polygon a: points = (0 0, 1 0, 1 1, 0 1) color = (255, 0, 0)\nlist l: [a]\n", {})
+    union = parse_set_operation("union u: l", variables)
+
+    assert "u" not in variables
+    parse_commands("translate l: x = 10 y = 0", variables)
+    union.evaluate()
+    assert variables["u"].geometries[0].evaluate().bounds == (10, 0, 11, 1)
+
+class ExtentRenderer:
+    extent = None
+
+    def __init__(self):
+        self.frames = []
+
+    def render(self, store, path=None):
+        low, high = store.extent()
+        self.frames.append(low.tolist() + high.tolist())
+
+def test_repeat_body_definitions_run_every_iteration():
+    variables = parse_commands("polygon a: points = (0 0, 1 0, 1 1, 0 1) color = (255, 0, 0)\nlist l: [a]\n", {})
+    cycle = parse_repeat_cycle("repeat 3:\n    scale l: factor = 2 origin = (0 0)\n    union u: l\n    area s: l\n    plot u\n", variables)
+    renderer, previous = ExtentRenderer(), get_renderer()
+    set_renderer(renderer)
+    try:
+        cycle.evaluate()
+    finally:
+        set_renderer(previous)
+
+    assert renderer.frames == [[0, 0, 2, 2], [0, 0, 4, 4], [0, 0, 8, 8]]
+    # Jména z těla cyklu zůstanou v jeho rozsahu
+    assert "u" not in variables and "s" not in variables
+    assert cycle.body[0].symbols.lookup("s").values.tolist() == [64]
+
+def test_entry_points_accept_the_same_scripts():
+    from src.session import Session
+
+    valid = "  polygon p: points = (0 0, 1 0, 1 1) color = (1, 1, 1)\npolygon q:\n    points = (0 0, 2 0, 2 2)\n    color = (1, 1, 1)\n"
+    one_line = "polygon p: points = (0 0, 1 0, 1 1) color = (1, 1, 1) polygon q: points = (0 0, 2 0, 2 2) color = (1, 1, 1)\n"
+    indented = "  polygon p: points = (0 0, 1 0, 1 1) color = (1, 1, 1)\n  polygon q: points = (0 0, 2 0, 2 2) color = (1, 1, 1)\n"
+    runs = [lambda code: parse_commands(code, {}), lambda code: Session().update(code), lambda code: run_lines(code.splitlines(), {})]
+
+    for run in runs:
+        assert set(run(valid)) == {"p", "q"}
+        for code in (one_line, indented):
+            with pytest.raises(ParseError):
+                run(code)
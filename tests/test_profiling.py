@@ -0,0 +1,77 @@
+from src.profiling import Profiler
+from src.parser import parse_commands
+from src.cache import ProgramCache, run_cached
+from src.my_ast import TransformNode, RepeatCycleNode
+from src.raster import RasterRenderer
+from src.render import get_renderer, set_renderer
+import json
+
+code = """
+polygon p1:
+    points = (0 0, 1 1, 1 0)
+    color = (255, 0, 0)
+
+polygon p2:
+    points = (0 0, -1 -1, -1 0)
+    color = (255, 255, 0)
+
+list l:
+    [p1, p2]
+
+repeat 3:
+    rotate l: angle = 10 origin = center
+    plot l
+"""
+
+def profile(tmp_path, memory: bool = False, run=parse_commands) -> Profiler:
+    previous = get_renderer()
+    set_renderer(RasterRenderer(path=str(tmp_path / "frame.png"), size=(64, 48)))
+    try:
+        with Profiler(memory=memory) as profiler:
+            run(code, {})
+    finally:
+        set_renderer(previous)
+    return profiler
+
+def test_profile_counts(tmp_path):
+    report = profile(tmp_path).report()
+
+    assert report["parse"]["program"]["calls"] == 1
+    assert report["commands"]["polygon"]["calls"] == 2
+    assert set(report["lines"]) == {"2", "6", "10", "13"}
+    assert report["nodes"]["RepeatCycleNode"]["calls"] == 1
+    assert report["nodes"]["TransformNode"]["calls"] == 3
+    assert report["nodes"]["TransformNode"]["vertices"] == 3 * 8
+    assert report["render"]["RasterRenderer"]["calls"] == 3
+    assert report["render"]["RasterRenderer"]["vertices"] == 3 * 8
+    # Čas cyklu zahrnuje čas jeho těla
+    assert report["lines"]["13"]["seconds"] >= report["render"]["RasterRenderer"]["seconds"]
+
+def test_patches_are_removed(tmp_path):
+    evaluate, compile = TransformNode.evaluate, RepeatCycleNode.compile
+    profile(tmp_path)
+
+    assert TransformNode.evaluate is evaluate and RepeatCycleNode.compile is compile
+
+def test_memory_and_json(tmp_path):
+    profiler = profile(tmp_path, memory=True)
+    profiler.to_json(str(tmp_path / "profile.json"))
+
+    with open(tmp_path / "profile.json", encoding="utf-8") as file:
+        report = json.load(file)
+    assert report["commands"]["repeat"]["peak_bytes"] > 0
+    assert "RasterRenderer" in profiler.text()
+
+def test_profile_cached_run(tmp_path):
+    cache = ProgramCache(str(tmp_path / "cache"))
+    run = lambda code, variables: run_cached(code, variables, cache)
+
+    report = profile(tmp_path, run=run).report()
+    assert report["parse"]["program"]["calls"] == 1
+    assert report["commands"]["polygon"]["calls"] == 2
+    assert set(report["lines"]) == {"2", "6", "10", "13"}
+
+    # Z cache se nic neparsuje, příkazy se měří dál
+    report = profile(tmp_path, run=run).report()
+    assert report["parse"] == {}
+    assert report["commands"]["repeat"]["calls"] == 1
@@ -0,0 +1,38 @@
+from src.raster import RasterRenderer
+from src.my_ast import PolygonNode, PointNode, GeometryListNode, DrawNode, pack_nodes
+from PIL import Image
+import numpy as np
+
+def test_to_pixels_keeps_aspect():
+    renderer = RasterRenderer(size=(200, 100), margin=0)
+
+    pixels = renderer.to_pixels(np.array([[0, 0], [4, 1], [2, 2]]))
+
+    assert pixels.tolist() == [[0, 100], [200, 50], [100, 0]]
+
+def test_polygon_fill_color_and_alpha():
+    renderer = RasterRenderer(size=(100, 100))
+    nodes = [PolygonNode([(0, 0), (10, 0), (10, 10), (0, 10)], color=[255, 0, 0]), PointNode((20, 20), color=[0, 0, 255])]
+
+    image = renderer.draw(pack_nodes(nodes))
+
+    assert image.getpixel((25, 75)) == (255, 127, 127)
+    assert image.getpixel((95, 5)) == (0, 0, 255)
+    assert image.getpixel((75, 25)) == (255, 255, 255)
+
+def test_raster_plot_formats(tmp_path):
+    nodes = GeometryListNode()
+    nodes.add(PolygonNode([(0, 0), (1, 1), (1, 0)], color=[255, 0, 0]))
+
+    for name in ("frame.png", "frame.jpg"):
+        DrawNode(nodes, renderer=RasterRenderer(path=str(tmp_path / name), size=(64, 48))).evaluate()
+        assert Image.open(tmp_path / name).size == (64, 48)
+
+def test_polygon_hole_is_not_filled():
+    node = PolygonNode([(0, 0), (3, 0), (3, 3), (0, 3)], color=[255, 0, 0])
+    node.set_geometry(node.evaluate().difference(PolygonNode([(1, 1), (2, 1), (2, 2), (1, 2)]).evaluate()))
+
+    image = RasterRenderer(size=(90, 90), margin=0).draw(pack_nodes([node]))
+
+    assert image.getpixel((15, 45)) == (255, 127, 127)
+    assert image.getpixel((45, 45)) == (255, 255, 255)
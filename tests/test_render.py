@@ -0,0 +1,48 @@
+from src.render import Renderer, get_renderer, set_renderer
+from src.my_ast import PolygonNode, LineNode, PointNode, CircleNode, GeometryListNode, DrawNode
+from matplotlib.collections import PolyCollection
+from PIL import Image
+
+def make_list() -> GeometryListNode:
+    nodes = GeometryListNode()
+    for i in range(3):
+        nodes.add(PolygonNode([(i, 0), (i + 1, 1), (i + 1, 0)], color=[255, 0, 0]))
+    nodes.add(LineNode(points=[(0, 0), (2, 2)], color=[0, 0, 255]))
+    nodes.add(PointNode((1, 1), color=[0, 255, 0]))
+    nodes.add(CircleNode((0, 0), 1, color=[255, 0, 255]))
+    return nodes
+
+def test_headless_render_batches_kinds(tmp_path):
+    renderer = Renderer(path=str(tmp_path / "frame.png"), headless=True)
+
+    DrawNode(make_list(), renderer=renderer).evaluate()
+
+    collections = renderer.axes.collections
+    # Kružnice se rozloží na uzavřené čáry a kreslí se spolu s čarami
+    assert sorted(type(c).__name__ for c in collections) == ["LineCollection", "PathCollection", "PolyCollection"]
+    assert len(next(c for c in collections if isinstance(c, PolyCollection)).get_paths()) == 3
+    assert Image.open(tmp_path / "frame.png").size == (640, 480)
+
+def test_headless_render_reuses_figure(tmp_path):
+    renderer = Renderer(path=str(tmp_path / "frame.svg"), headless=True)
+    nodes = make_list()
+    nodes.pack()
+
+    DrawNode(nodes, renderer=renderer).evaluate()
+    figure = renderer.figure
+    DrawNode(nodes.geometries[0], renderer=renderer).evaluate()
+
+    assert renderer.figure is figure
+    assert len(renderer.axes.collections) == 1
+    assert (tmp_path / "frame.svg").read_text().lstrip().startswith("<?xml")
+
+def test_default_renderer(tmp_path):
+    previous = get_renderer()
+    renderer = Renderer(path=str(tmp_path / "plot.jpg"), headless=True)
+    set_renderer(renderer)
+    try:
+        DrawNode(make_list()).evaluate()
+    finally:
+        set_renderer(previous)
+
+    assert (tmp_path / "plot.jpg").exists()
@@ -0,0 +1,95 @@
+from src.session import Session
+from src.parser import parse_commands
+from src.my_ast import GeometryListNode, MeasureNode
+import pytest
+
+script = """
+polygon a:
+    points = (0 0, 1 0, 1 1)
+    color = (255, 0, 0)
+
+polygon b:
+    points = (5 5, 6 5, 6 6)
+    color = (0, 255, 0)
+
+point x:
+    (2 2)
+    color = (0, 0, 255)
+
+list l:
+    [a, b]
+
+union u: [a, x]
+
+translate x:
+    x = 1
+    y = 1
+
+scale l: factor = 2 origin = (0 0)
+
+area s: l
+
+circle c:
+    center = (10 10)
+    radius = 2
+    color = (0, 0, 0)
+
+rotate c: angle = 45 origin = center
+"""
+
+def snapshot(variables: dict) -> dict:
+    result = {}
+    for name, value in variables.items():
+        if isinstance(value, GeometryListNode):
+            result[name] = [node.evaluate().wkt for node in value.geometries]
+        elif isinstance(value, MeasureNode):
+            result[name] = value.values.tolist()
+        else:
+            result[name] = value.evaluate().wkt
+    return result
+
+def run(session: Session, code: str) -> int:
+    executed = session.executed
+    assert snapshot(session.update(code)) == snapshot(parse_commands(code, {}))
+    return session.executed - executed
+
+def test_unchanged_script_executes_nothing():
+    session = Session()
+
+    assert run(session, script) == 10
+    assert run(session, script) == 0
+
+def test_edit_reruns_dependent_blocks():
+    session = Session()
+    run(session, script)
+
+    for edited, executed in [(script.replace("area s: l", "perimeter s: l"), 1), (script.replace("radius = 2", "radius = 3"), 2), (script.replace("angle = 45", "angle = 30"), 2)]:
+        assert run(session, edited) == executed
+        run(session, script)
+
+def test_read_before_later_change_is_rebuilt():
+    session = Session()
+    run(session, script)
+
+    # Sjednocení čte x před posunem, x se proto musí postavit znovu, kružnice ne
+    assert run(session, script.replace("(0 0, 1 0, 1 1)", "(0 0, 2 0, 2 2)")) == 8
+    run(session, script)
+    assert run(session, script.replace("x = 1", "x = 2")) == 8
+
+def test_insert_and_delete_blocks():
+    session = Session()
+    run(session, script)
+    inserted = script.replace("union u:", "rotate l: angle = 90 origin = (0 0)\n\nunion u:")
+
+    run(session, inserted)
+    run(session, script)
+    run(session, script.replace("area s: l\n", ""))
+
+def test_error_resets_session():
+    session = Session()
+    run(session, script)
+
+    with pytest.raises(ValueError):
+        session.update(script.replace("list l:\n    [a, b]", "list l:\n    [a, d]"))
+
+    assert run(session, script) == 10
@@ -0,0 +1,129 @@
+from src.store import GeometryStore, POINT, LINE, POLYGON, CIRCLE, circle_control
+from src.my_ast import PointNode, LineNode, PolygonNode, CircleNode, GeometryListNode, TransformNode
+from shapely import Point, LineString, Polygon, equals_exact
+import numpy as np
+import pickle
+from src.affine import translation_matrix
+
+def make_list() -> GeometryListNode:
+    nodes = GeometryListNode()
+    nodes.add(PolygonNode([(0, 0), (1, 1), (1, 0)], color=[255, 0, 0]))
+    nodes.add(LineNode(points=[(0, 0), (2, 0)], color=[0, 255, 0]))
+    nodes.add(PointNode((3, 4), color=[0, 0, 255]))
+    nodes.add(CircleNode((5, 5), 1, color=[10, 20, 30]))
+    return nodes
+
+def test_store_from_geometries():
+    geometries = np.array([Point(1, 2), LineString([(0, 0), (1, 1), (2, 0)]), Polygon([(0, 0), (1, 0), (0, 1)])])
+    store = GeometryStore.from_geometries(geometries, [POINT, LINE, POLYGON], [(1, 2, 3), (4, 5, 6), (7, 8, 9)])
+
+    assert store.offsets.tolist() == [0, 1, 4, 8]
+    assert store.coords.shape == (8, 2)
+    assert store.colors.dtype == np.uint8 and store.kinds.dtype == np.uint8
+    assert all(equals_exact(a, b, 0) for a, b in zip(store.geometries(), geometries))
+    assert equals_exact(store.geometry(2), geometries[2], 0)
+    assert store.bounds().tolist() == [[1, 2, 1, 2], [0, 0, 2, 1], [0, 0, 1, 1]]
+
+def test_pack_keeps_nodes_as_views():
+    nodes = make_list()
+    members = list(nodes.geometries)
+    expected = [node.evaluate() for node in members]
+
+    store = nodes.pack()
+
+    assert nodes.is_packed()
+    assert nodes.geometries == members
+    assert all(node.store is store and node.geometry is None for node in members)
+    assert all(equals_exact(node.evaluate(), geometry, 0) for node, geometry in zip(members, expected))
+    assert members[3].color == [10, 20, 30]
+
+def test_packed_list_transform():
+    nodes = make_list()
+    nodes.pack()
+
+    TransformNode(nodes, operation='translate', x=1, y=2).evaluate()
+    TransformNode(nodes, operation='scale', factor=2, origin="center").evaluate()
+
+    assert list(nodes.geometries[0].evaluate().exterior.coords) == [(0.5, 1.5), (2.5, 3.5), (2.5, 1.5), (0.5, 1.5)]
+    assert (nodes.geometries[2].evaluate().x, nodes.geometries[2].evaluate().y) == (4, 6)
+
+def test_view_detaches_on_new_shape():
+    nodes = make_list()
+    nodes.pack()
+    line = nodes.geometries[1]
+
+    line.set_geometry(LineString([(0, 0), (1, 1), (2, 2)]))
+
+    assert line.store is None and line.color == [0, 255, 0]
+    assert not nodes.is_packed()
+    TransformNode(nodes, operation='translate', x=1, y=0).evaluate()
+    assert list(line.evaluate().coords) == [(1, 0), (2, 1), (3, 2)]
+    assert list(nodes.geometries[0].evaluate().exterior.coords)[0] == (1, 0)
+
+def test_list_from_store():
+    store = GeometryStore(np.array([[0, 0], [1, 0], [0, 1], [0, 0], [5, 5]]), [0, 4, 5], [POLYGON, POINT], [(1, 1, 1), (2, 2, 2)])
+
+    nodes = GeometryListNode.from_store(store)
+
+    assert [type(node) for node in nodes.geometries] == [PolygonNode, PointNode]
+    assert nodes.is_packed()
+    assert nodes.geometries[1].color == [2, 2, 2]
+
+def test_snapshot_pickles_without_nodes():
+    store = make_list().pack()
+
+    copy = pickle.loads(pickle.dumps(store.snapshot()))
+    store.transform(translation_matrix(1, 0))
+
+    assert copy.attached == 0
+    assert copy.coords[:4].tolist() == [[0, 0], [1, 1], [1, 0], [0, 0]]
+    assert copy.colors.tolist() == store.colors.tolist()
+
+def test_store_keeps_holes():
+    holed = Polygon([(0, 0), (10, 0), (10, 10), (0, 10)], [[(2, 2), (4, 2), (4, 4), (2, 4)], [(6, 6), (8, 6), (8, 8), (6, 8)]])
+    geometries = np.array([Point(20, 20), holed, Polygon([(0, 0), (1, 0), (1, 1)])], dtype=object)
+
+    store = GeometryStore.from_geometries(geometries, [POINT, POLYGON, POLYGON], [(0, 0, 0)] * 3)
+
+    assert store.has_holes()
+    assert store.offsets.tolist() == [0, 1, 16, 20]
+    assert store.rings.tolist() == [0, 1, 6, 11, 16, 20]
+    assert all(equals_exact(a, b) for a, b in zip(store.geometries(), geometries))
+    assert equals_exact(store.geometry(1), holed)
+    assert store.write(1, Polygon(holed.exterior, [holed.interiors[0]])) is False
+    assert store.write(1, Polygon(holed.exterior, [holed.interiors[1], holed.interiors[0]])) is True
+
+def test_take_rows():
+    holed = Polygon([(0, 0), (10, 0), (10, 10), (0, 10)], [[(2, 2), (4, 2), (4, 4), (2, 4)]])
+    geometries = np.array([Point(20, 20), holed, LineString([(0, 0), (1, 1)]), holed], dtype=object)
+    store = GeometryStore.from_geometries(geometries, [POINT, POLYGON, LINE, POLYGON], [(1, 1, 1), (2, 2, 2), (3, 3, 3), (4, 4, 4)])
+
+    part = store.take([1, 2])
+
+    assert part.kinds.tolist() == [POLYGON, LINE]
+    assert part.colors.tolist() == [[2, 2, 2], [3, 3, 3]]
+    assert part.rings.tolist() == [0, 5, 10, 12]
+    assert all(equals_exact(a, b) for a, b in zip(part.geometries(), geometries[1:3]))
+    assert len(store.take([])) == 0
+
+def test_circle_stays_analytic():
+    nodes = GeometryListNode()
+    nodes.add(CircleNode((1, 2), 3, color=[0, 0, 0]))
+    nodes.add(PointNode((0, 0), color=[0, 0, 0]))
+    store = nodes.pack()
+
+    TransformNode(nodes, operation="scale", factor=2, origin=(0, 0)).evaluate()
+
+    assert store.coordinates(0).tolist() == circle_control((2, 4), 6).tolist()
+    assert store.bounds()[0].tolist() == [-4, -2, 8, 10]
+    assert equals_exact(store.geometry(0), Point(2, 4).buffer(6))
+    assert equals_exact(store.geometries()[0], Point(2, 4).buffer(6))
+
+def test_ellipse_after_rotation_and_tessellation():
+    store = GeometryStore(circle_control((0, 0), 1) * [4, 1], [0, 3], [CIRCLE], [(0, 0, 0)])
+
+    assert store.bounds().tolist() == [[-4, -1, 4, 1]]
+    coarse, fine = store.tessellated(1.0), store.tessellated(0.001)
+    assert coarse.kinds.tolist() == [LINE] and len(coarse.coords) < len(fine.coords) <= 1025
+    assert np.allclose((fine.coords ** 2 / [16, 1]).sum(axis=1), 1)
+    assert store.tessellated() is not store and len(store.tessellated().coords) == 65
@@ -0,0 +1,61 @@
+from src.symbols import SymbolTable, resolve, statement_names
+from src.parser import parse_commands, parse_program
+import pytest
+
+def test_scopes():
+    symbols = SymbolTable({"a": 1})
+    inner = symbols.scope()
+    inner.define("b", 2)
+
+    assert inner.lookup("a") == 1 and inner.lookup("b") == 2
+    assert "b" in inner and "b" not in symbols
+    with pytest.raises(ValueError, match="Unknown geometry variable: b"):
+        symbols.lookup("b")
+
+def test_unknown_name_fails_before_execution():
+    code = """
+point a:
+    (1 1)
+    color = (255, 0, 0)
+
+translate a: x = 1 y = 1
+
+list l: [a, b]
+"""
+    variables = {}
+    with pytest.raises(ValueError, match="Unknown geometry variable: b"):
+        parse_commands(code, variables)
+
+    assert variables == {}
+
+def test_repeat_scope():
+    code = """
+point a:
+    (0 0)
+    color = (255, 0, 0)
+
+repeat 3:
+    point step:
+        (1 0)
+        color = (0, 0, 255)
+    list l: [a, step]
+    translate a: x = 1 y = 0
+"""
+    variables = parse_commands(code, {})
+
+    assert set(variables) == {"a"}
+    assert variables["a"].evaluate().wkt == "POINT (3 0)"
+    reads, writes, aliases = statement_names(parse_program(code)[1])
+    assert (reads, writes, aliases) == ({"a"}, {"a"}, [])
+
+def test_repeat_local_is_not_visible_outside():
+    code = """
+repeat 2:
+    point step:
+        (1 0)
+        color = (0, 0, 255)
+
+plot step
+"""
+    with pytest.raises(ValueError, match="Unknown geometry variable: step"):
+        resolve(parse_program(code), set())